@@ -0,0 +1,61 @@
+import argparse
+import os
+import sys
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_editor import MultiCursorText
+
+# Times typing and BackSpace in MultiCursorText with 1, 10 and 100 active cursors, along
+# the same paths as its key handlers. Tk needs a display; on a headless machine run it
+# under Xvfb:
+#     xvfb-run -a python benchmarks/multi_cursor.py
+
+def setup_cursors(widget, count):
+    widget.insert("1.0", "line of text\n" * max(count, 1))
+    for line in range(2, count + 1):
+        widget.mark_set(tk.INSERT, f"{line}.0")
+        widget.add_cursor()
+    widget.mark_set(tk.INSERT, "1.0")
+
+def time_edits(widget, operations):
+    # With no extra cursors the key handlers fall through to Tk's plain insert and delete
+    start = time.perf_counter()
+    for _ in range(operations):
+        if widget.cursors:
+            widget.insert_at_cursors("x")
+        else:
+            widget.insert(tk.INSERT, "x")
+    insert_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(operations):
+        if widget.cursors:
+            widget.delete_at_cursors(1, 0)
+        else:
+            widget.delete("insert-1c", tk.INSERT)
+    delete_elapsed = time.perf_counter() - start
+    return insert_elapsed, delete_elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark multi-cursor editing")
+    parser.add_argument("--operations", type=int, default=2000)
+    args = parser.parse_args()
+
+    root = tk.Tk()
+    root.withdraw()
+    for count in (1, 10, 100):
+        widget = MultiCursorText(root)
+        setup_cursors(widget, count)
+        insert_elapsed, delete_elapsed = time_edits(widget, args.operations)
+        print(
+            f"{count:>3} cursors: insert {insert_elapsed / args.operations * 1e6:8.1f} us/op, "
+            f"delete {delete_elapsed / args.operations * 1e6:8.1f} us/op"
+        )
+        widget.destroy()
+    root.destroy()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import argparse
+import os
+import sys
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_editor import MultiCursorText
+from utils.output_buffer import OutputBuffer
+
+# Renders the same stream of small output chunks into the terminal widget twice:
+# once with an insert + see() per chunk (the old path) and once through OutputBuffer.
+# Tk needs a display; on a headless machine run it under Xvfb:
+#     xvfb-run -a python benchmarks/output_rendering.py
+# --headless hands the output to a display-less Tcl interpreter instead: every insert,
+# see() and after() is still a real Tcl round trip with the text converted to a Tcl
+# string, but the Text widget's own layout and drawing are left out of the timings.
+
+class HeadlessWidget:
+    # Stands in for the Text widget on tkinter.Tcl(), which needs no display
+    def __init__(self, interpreter):
+        self.tk = interpreter
+        self.calls = 0
+
+    def insert(self, index, chars):
+        self.calls += 1
+        self.tk.call("set", "output", chars)
+
+    def see(self, index):
+        self.calls += 1
+        self.tk.call("string", "length", index)
+
+    def after(self, ms, func):
+        self.calls += 1
+        return self.tk.call("after", ms, self.tk.register(func))
+
+    def after_cancel(self, job):
+        self.calls += 1
+        self.tk.call("after", "cancel", job)
+
+    def update(self):
+        self.tk.call("update")
+
+def output_chunks(lines, lines_per_chunk):
+    line = "x" * 60 + "\n"
+    for _ in range(lines // lines_per_chunk):
+        yield line * lines_per_chunk
+
+def render_direct(widget, lines, lines_per_chunk):
+    start = time.perf_counter()
+    for chunk in output_chunks(lines, lines_per_chunk):
+        widget.insert(tk.END, chunk)
+        widget.see(tk.END)
+    widget.update()
+    return time.perf_counter() - start
+
+def render_buffered(widget, lines, lines_per_chunk):
+    buffer = OutputBuffer(widget)
+    frame = buffer.interval / 1000
+    start = time.perf_counter()
+    next_frame = start + frame
+    for chunk in output_chunks(lines, lines_per_chunk):
+        buffer.write(chunk)
+        if time.perf_counter() >= next_frame:
+            buffer.flush()
+            widget.update()
+            next_frame = time.perf_counter() + frame
+    buffer.flush()
+    widget.update()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark terminal output rendering")
+    parser.add_argument("--lines", type=int, default=1000000)
+    parser.add_argument("--lines-per-chunk", type=int, default=1)
+    parser.add_argument("--headless", action="store_true", help="render into Tcl without a display")
+    args = parser.parse_args()
+
+    if args.headless:
+        root = tk.Tcl()
+    else:
+        root = tk.Tk()
+        root.withdraw()
+    for name, render in (("direct", render_direct), ("buffered", render_buffered)):
+        if args.headless:
+            widget = HeadlessWidget(root)
+        else:
+            widget = MultiCursorText(root)
+            widget.pack()
+        elapsed = render(widget, args.lines, args.lines_per_chunk)
+        result = f"{name:>9}: {args.lines} lines in {elapsed:.2f}s ({args.lines / elapsed:,.0f} lines/s)"
+        if args.headless:
+            result += f", {widget.calls:,} Tcl calls"
+        else:
+            widget.destroy()
+        print(result)
+    if not args.headless:
+        root.destroy()
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,26 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
+from tkinter import ttk, messagebox, simpledialog, filedialog
 import os
-import shutil
 import stat
 import posixpath
+import queue
+import threading
+from utils.file_operations import FileOperationQueue, LocalBackend, SftpBackend
+
+PAGE_SIZE = 1000  # children materialized per "more" page
+BATCH_SIZE = 200  # tree items inserted per poll
+POLL_INTERVAL = 20  # ms
 
 class FileExplorer(ttk.Frame):
     def __init__(self, parent, terminal):
         super().__init__(parent)
         self.terminal = terminal
+        self.listings = {}
+        self.load_counter = 0
+        self.scan_results = queue.Queue()
+        self.operations = FileOperationQueue()
         self.create_widgets()
+        self.after(POLL_INTERVAL, self.poll_listings)
 
     def create_widgets(self):
         self.tree = ttk.Treeview(self)
@@ -20,7 +31,13 @@ class FileExplorer(ttk.Frame):
         self.tree.configure(yscrollcommand=scrollbar.set)
 
         self.tree.heading("#0", text="File Explorer", anchor=tk.W)
+
+        self.progress_frame = ttk.Frame(self)
+        self.progress_label = ttk.Label(self.progress_frame, anchor=tk.W)
+        self.progress_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        ttk.Button(self.progress_frame, text="Cancel", command=self.cancel_operations).pack(side=tk.RIGHT)
         self.tree.bind("<<TreeviewOpen>>", self.update_tree)
+        self.tree.bind("<<TreeviewClose>>", self.collapse_node)
         self.tree.bind("<Double-1>", self.on_double_click)
         self.tree.bind("<Button-3>", self.show_context_menu)
 
@@ -29,51 +46,131 @@ class FileExplorer(ttk.Frame):
         self.context_menu.add_command(label="New Folder", command=self.create_folder)
         self.context_menu.add_command(label="Rename", command=self.rename_item)
         self.context_menu.add_command(label="Delete", command=self.delete_item)
+        self.context_menu.add_command(label="Follow", command=self.follow_item)
+        self.context_menu.add_separator()
+        self.context_menu.add_command(label="Download\u2026", command=self.download_item)
+        self.context_menu.add_command(label="Upload Files\u2026", command=self.upload_files)
+        self.context_menu.add_command(label="Upload Folder\u2026", command=self.upload_folder)
+        self.context_menu.add_separator()
+        self.context_menu.add_command(label="Refresh", command=self.refresh_item)
 
         self.populate_tree()
 
     def populate_tree(self):
         self.tree.delete(*self.tree.get_children())
+        self.listings = {}
         path = self.terminal.current_directory
-        node = self.tree.insert("", tk.END, text=path, open=True)
+        if path is None:
+            return
+        node = self.tree.insert("", tk.END, text=path, open=True, tags=("directory",))
         self.process_directory(node, path)
 
     def process_directory(self, parent, path):
         if self.terminal.is_ssh_connected():
-            self.process_remote_directory(parent, path)
+            self.load_directory(parent, path, self.list_remote_directory)
         else:
-            self.process_local_directory(parent, path)
+            self.load_directory(parent, path, self.list_local_directory)
 
-    def process_local_directory(self, parent, path):
-        try:
-            for item in os.listdir(path):
-                item_path = os.path.join(path, item)
-                if os.path.isdir(item_path):
-                    folder = self.tree.insert(parent, tk.END, text=item, open=False)
-                    self.tree.insert(folder, tk.END, text="")
-                else:
-                    self.tree.insert(parent, tk.END, text=item)
-        except PermissionError:
-            pass
-
-    def process_remote_directory(self, parent, path):
+    def list_local_directory(self, path):
+        yield self.terminal.dir_cache.list(path)
+
+    def list_remote_directory(self, path):
+        cached = self.terminal.remote_dir_cache.get(path)
+        if cached is not None:
+            yield cached
+            return
+        # One pipelined listing with attributes instead of an lstat round trip per entry.
+        # Pages are shown as they arrive, so the cache keeps the same server order.
+        entries = []
+        for attrs in self.terminal.ssh_client.iter_directory(path):
+            page = [(attr.filename, stat.S_ISDIR(attr.st_mode or 0)) for attr in attrs]
+            entries.extend(page)
+            yield page
+        self.terminal.remote_dir_cache.put(path, entries)
+
+    def load_directory(self, parent, path, list_pages):
+        # Listing runs on a worker thread; poll_listings materializes the children in
+        # small batches, one page at a time, so the UI never waits on a huge directory.
+        self.load_counter += 1
+        self.listings[parent] = {
+            "token": self.load_counter,
+            "entries": [],
+            "shown": 0,
+            "limit": PAGE_SIZE,
+            "done": False,
+            "loading": self.tree.insert(parent, tk.END, text="Loading\u2026", tags=("placeholder",)),
+            "more": None,
+        }
+        worker = threading.Thread(target=self.scan_directory, args=(parent, self.load_counter, path, list_pages), daemon=True)
+        worker.start()
+
+    def scan_directory(self, parent, token, path, list_pages):
         try:
-            sftp = self.terminal.ssh_client.open_sftp()
-            for item in sftp.listdir(path):
-                item_path = posixpath.join(path, item)
-                try:
-                    attr = sftp.lstat(item_path)
-                    if stat.S_ISDIR(attr.st_mode):
-                        folder = self.tree.insert(parent, tk.END, text=item, open=False)
-                        self.tree.insert(folder, tk.END, text="")
-                    else:
-                        self.tree.insert(parent, tk.END, text=item)
-                except IOError:
-                    pass  # Skip items we can't access
-            sftp.close()
+            for page in list_pages(path):
+                self.scan_results.put((parent, token, page, None))
+            self.scan_results.put((parent, token, None, None))
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to list remote directory: {str(e)}")
+            self.scan_results.put((parent, token, None, e))
 
+    def poll_listings(self):
+        while True:
+            try:
+                parent, token, page, error = self.scan_results.get_nowait()
+            except queue.Empty:
+                break
+            listing = self.listings.get(parent)
+            if not listing or listing["token"] != token:
+                continue  # The node was collapsed or reloaded meanwhile
+            if page is not None:
+                listing["entries"].extend(page)
+            else:
+                listing["done"] = True
+                if error is not None and self.terminal.is_ssh_connected():
+                    messagebox.showerror("Error", f"Failed to list remote directory: {str(error)}")
+        for parent in list(self.listings):
+            self.insert_batch(parent)
+        self.poll_operations()
+        self.after(POLL_INTERVAL, self.poll_listings)
+
+    def insert_batch(self, parent):
+        listing = self.listings[parent]
+        if not self.tree.exists(parent):
+            del self.listings[parent]
+            return
+        entries = listing["entries"]
+        end = min(len(entries), listing["limit"], listing["shown"] + BATCH_SIZE)
+        for item, is_dir in entries[listing["shown"]:end]:
+            if is_dir:
+                folder = self.tree.insert(parent, tk.END, text=item, open=False, tags=("directory",))
+                self.tree.insert(folder, tk.END, text="", tags=("placeholder",))
+            else:
+                self.tree.insert(parent, tk.END, text=item)
+        listing["shown"] = end
+
+        if listing["loading"] and (end > 0 or listing["done"]):
+            self.tree.delete(listing["loading"])
+            listing["loading"] = None
+
+        remaining = len(entries) - end
+        if remaining > 0 and end >= listing["limit"]:
+            label = f"{remaining} more\u2026" if listing["done"] else f"{remaining}+ more\u2026"
+            if listing["more"] is None:
+                listing["more"] = self.tree.insert(parent, tk.END, text=label, tags=("more",))
+            else:
+                self.tree.item(listing["more"], text=label)
+                self.tree.move(listing["more"], parent, tk.END)
+        elif listing["more"] is not None:
+            self.tree.delete(listing["more"])
+            listing["more"] = None
+
+        if listing["done"] and remaining == 0:
+            del self.listings[parent]
+
+    def show_more(self, item):
+        parent = self.tree.parent(item)
+        listing = self.listings.get(parent)
+        if listing:
+            listing["limit"] += PAGE_SIZE
 
     def update_tree(self, event):
         selected_item = self.tree.focus()
@@ -81,6 +178,28 @@ class FileExplorer(ttk.Frame):
         path = self.get_selected_path(selected_item)
         self.process_directory(selected_item, path)
 
+    def refresh_item(self):
+        item = self.tree.selection()[0]
+        if not self.tree.get_children(item):
+            item = self.tree.parent(item) or item
+        path = self.get_selected_path(item)
+        if self.terminal.is_ssh_connected():
+            self.terminal.remote_dir_cache.invalidate(path)
+        else:
+            self.terminal.dir_cache.invalidate(path)
+        self.tree.item(item, open=True)
+        self.tree.focus(item)
+        self.update_tree(None)
+
+    def collapse_node(self, event):
+        # Collapsed directories drop their children; they are listed again on the next open
+        item = self.tree.focus()
+        if not self.tree.parent(item):
+            return
+        self.listings.pop(item, None)
+        self.tree.delete(*self.tree.get_children(item))
+        self.tree.insert(item, tk.END, text="", tags=("placeholder",))
+
     def get_selected_path(self, item):
         path_parts = []
         while item:
@@ -93,62 +212,188 @@ class FileExplorer(ttk.Frame):
 
     def on_double_click(self, event):
         item = self.tree.selection()[0]
+        tags = self.tree.item(item, "tags")
+        if "more" in tags:
+            self.show_more(item)
+            return
+        if "placeholder" in tags:
+            return
         path = self.get_selected_path(item)
         self.terminal.open_file(path)
 
+    def follow_item(self):
+        item = self.tree.selection()[0]
+        if set(self.tree.item(item, "tags")) & {"more", "placeholder"}:
+            return
+        self.terminal.follow_file(self.get_selected_path(item))
+
+    def download_item(self):
+        item = self.tree.selection()[0]
+        if set(self.tree.item(item, "tags")) & {"more", "placeholder"}:
+            return
+        directory = filedialog.askdirectory(title="Download to")
+        if directory:
+            self.terminal.start_transfer("download", [self.get_selected_path(item)], directory)
+
+    def upload_files(self):
+        paths = filedialog.askopenfilenames(title="Upload files")
+        if paths:
+            self.terminal.start_transfer("upload", paths, self.target_directory())
+
+    def upload_folder(self):
+        path = filedialog.askdirectory(title="Upload folder")
+        if path:
+            self.terminal.start_transfer("upload", [path], self.target_directory())
+
+    def target_directory(self):
+        # Uploads go into the selected directory, or next to the selected file
+        item = self.tree.selection()[0]
+        path = self.get_selected_path(item)
+        if "directory" in self.tree.item(item, "tags"):
+            return path
+        return posixpath.dirname(path)
+
     def show_context_menu(self, event):
         item = self.tree.identify_row(event.y)
         if item:
             self.tree.selection_set(item)
+            state = tk.NORMAL if self.terminal.is_ssh_connected() else tk.DISABLED
+            for label in ("Download\u2026", "Upload Files\u2026", "Upload Folder\u2026"):
+                self.context_menu.entryconfigure(label, state=state)
             self.context_menu.post(event.x_root, event.y_root)
 
+    def file_backend(self):
+        if self.terminal.is_ssh_connected():
+            return SftpBackend(self.terminal.ssh_client.get_sftp())
+        return LocalBackend()
+
+    def run_operation(self, description, function, on_done):
+        # Filesystem work runs on the operation pool; poll_operations applies the result
+        self.operations.submit(description, function, on_done)
+        self.show_progress()
+
+    def poll_operations(self):
+        for operation in self.operations.finished():
+            if operation.error is not None:
+                messagebox.showerror("Error", f"{operation.description} failed: {str(operation.error)}")
+            elif operation.cancelled:
+                self.terminal.write_output(f"\n{operation.description} cancelled\n")
+            if operation.on_done is not None:
+                operation.on_done(operation)
+        self.show_progress()
+
+    def show_progress(self):
+        active = self.operations.active
+        if not active:
+            self.progress_frame.pack_forget()
+            return
+        operation = active[0]
+        text = f"{operation.description}: {operation.done:,} items"
+        if len(active) > 1:
+            text += f" (+{len(active) - 1} more)"
+        self.progress_label.configure(text=text)
+        if not self.progress_frame.winfo_ismapped():
+            self.progress_frame.pack(side=tk.BOTTOM, fill=tk.X, before=self.tree)
+
+    def cancel_operations(self):
+        for operation in self.operations.active:
+            operation.cancel()
+
+    def invalidate_directory(self, path):
+        if self.terminal.is_ssh_connected():
+            self.terminal.remote_dir_cache.invalidate(path)
+        else:
+            self.terminal.dir_cache.invalidate(path)
+
+    def is_loaded(self, item):
+        # Collapsed directories only hold a placeholder; they are listed fresh when opened
+        children = self.tree.get_children(item)
+        if item in self.listings:
+            return False
+        return not (len(children) == 1 and "placeholder" in self.tree.item(children[0], "tags"))
+
+    def insert_sorted(self, parent, name, is_dir, item=None):
+        # Places a new or renamed node among its siblings without relisting the directory
+        position = 0
+        for sibling in self.tree.get_children(parent):
+            if sibling == item or set(self.tree.item(sibling, "tags")) & {"more", "placeholder"}:
+                continue
+            if self.tree.item(sibling, "text").lower() > name.lower():
+                break
+            position += 1
+        if item is not None:
+            self.tree.move(item, parent, position)
+            return item
+        node = self.tree.insert(parent, position, text=name, open=False, tags=("directory",) if is_dir else ())
+        if is_dir:
+            self.tree.insert(node, tk.END, text="", tags=("placeholder",))
+        return node
+
     def create_file(self):
-        parent_item = self.tree.selection()[0]
-        parent_path = self.get_selected_path(parent_item)
-        file_name = simpledialog.askstring("New File", "Enter file name:")
-        if file_name:
-            file_path = os.path.join(parent_path, file_name)
-            try:
-                with open(file_path, 'w') as f:
-                    pass
-                self.update_tree(None)
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to create file: {str(e)}")
+        self.create_item("New File", "Enter file name:", is_dir=False)
 
     def create_folder(self):
+        self.create_item("New Folder", "Enter folder name:", is_dir=True)
+
+    def create_item(self, title, prompt, is_dir):
         parent_item = self.tree.selection()[0]
         parent_path = self.get_selected_path(parent_item)
-        folder_name = simpledialog.askstring("New Folder", "Enter folder name:")
-        if folder_name:
-            folder_path = os.path.join(parent_path, folder_name)
-            try:
-                os.mkdir(folder_path)
-                self.update_tree(None)
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to create folder: {str(e)}")
+        name = simpledialog.askstring(title, prompt)
+        if not name:
+            return
+        backend = self.file_backend()
+        path = backend.path.join(parent_path, name)
+        create = backend.make_directory if is_dir else backend.create_file
+
+        def on_done(operation):
+            self.invalidate_directory(parent_path)
+            if operation.error is None and self.tree.exists(parent_item) and self.is_loaded(parent_item):
+                self.insert_sorted(parent_item, name, is_dir)
+
+        self.run_operation(f"Creating {name}", lambda operation: create(path, operation), on_done)
 
     def rename_item(self):
         item = self.tree.selection()[0]
         old_path = self.get_selected_path(item)
-        old_name = os.path.basename(old_path)
+        backend = self.file_backend()
+        old_name = backend.path.basename(old_path)
         new_name = simpledialog.askstring("Rename", "Enter new name:", initialvalue=old_name)
-        if new_name:
-            new_path = os.path.join(os.path.dirname(old_path), new_name)
-            try:
-                os.rename(old_path, new_path)
-                self.update_tree(None)
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to rename: {str(e)}")
+        if not new_name or new_name == old_name:
+            return
+        parent_path = backend.path.dirname(old_path)
+        new_path = backend.path.join(parent_path, new_name)
+
+        def on_done(operation):
+            self.invalidate_directory(parent_path)
+            if operation.error is None and self.tree.exists(item):
+                self.tree.item(item, text=new_name)
+                parent = self.tree.parent(item)
+                if parent:
+                    self.insert_sorted(parent, new_name, False, item)
+
+        self.run_operation(f"Renaming {old_name}", lambda operation: backend.rename(old_path, new_path, operation), on_done)
 
     def delete_item(self):
         item = self.tree.selection()[0]
         path = self.get_selected_path(item)
-        if messagebox.askyesno("Delete", f"Are you sure you want to delete {path}?"):
-            try:
-                if os.path.isfile(path):
-                    os.remove(path)
-                else:
-                    shutil.rmtree(path)
-                self.update_tree(None)
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to delete: {str(e)}")
\ No newline at end of file
+        if not messagebox.askyesno("Delete", f"Are you sure you want to delete {path}?"):
+            return
+        backend = self.file_backend()
+        parent_path = backend.path.dirname(path)
+
+        def on_done(operation):
+            self.invalidate_directory(parent_path)
+            self.invalidate_directory(path)
+            if not self.tree.exists(item):
+                return
+            if operation.error is None and not operation.cancelled:
+                self.tree.delete(item)
+            elif self.tree.get_children(item):
+                # Partly deleted; the directory is listed again the next time it is opened
+                self.listings.pop(item, None)
+                self.tree.delete(*self.tree.get_children(item))
+                self.tree.insert(item, tk.END, text="", tags=("placeholder",))
+                self.tree.item(item, open=False)
+
+        name = backend.path.basename(path) or path
+        self.run_operation(f"Deleting {name}", lambda operation: backend.delete(path, operation), on_done)
@@ -1,47 +1,148 @@
+import array
+import io
 import os
+import queue
+import threading
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, simpledialog
 from tkhtmlview import HTMLLabel
-import json
 import csv
 import markdown
-from pygments import highlight
-from pygments.lexers import get_lexer_by_name, guess_lexer
-from pygments.formatters import HtmlFormatter
+from tkinter import font
+from utils.file_source import LocalFileSource, LineIndex, RowIndex
+from utils.highlighter import SyntaxHighlighter, lexer_for_file
+from utils.json_scanner import JsonScanner
+from utils.file_follower import FileFollower
+from utils.scrollback import Scrollback
+
+WINDOW_BYTES = 128 * 1024  # bytes read to render one screen
+SCAN_BYTES = 16 * 1024  # bytes read when looking for line boundaries
+RENDERERS = {".md": "markdown"}  # anything else is highlighted as code
+STYLE = "default"
 
 class FileViewer:
-    def __init__(self, parent, file_path):
+    SMALL_FILE_LIMIT = 1024 * 1024  # larger files from a byte source open in the windowed view
+    LARGE_FILE_LIMIT = 8 * 1024 * 1024  # larger local files are memory-mapped and windowed
+
+    def __init__(self, parent, file_path, source=None, render_cache=None, follow=False, sftp=None, style=STYLE):
         self.window = tk.Toplevel(parent)
         self.window.title(f"File Viewer - {file_path}")
         self.window.geometry("800x600")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
 
         self.file_path = file_path
-        self.load_file()
+        self.source = source
+        self.line_index = None
+        self.render_cache = render_cache
+        self.style = style  # Pygments style for code; part of the render cache key
+        self.render_key = None
+        self.rendered = None
+        self.highlighter = None
+        self.grid_view = None
+        self.json_view = None
+        self.follow_view = None
+        if follow:
+            self.show_follow(sftp)
+        else:
+            self.load_file()
 
     def load_file(self):
         _, ext = os.path.splitext(self.file_path)
         ext = ext.lower()
 
         try:
-            with open(self.file_path, "r", encoding="utf-8") as file:
-                content = file.read()
-
-            if ext == ".md":
-                html = markdown.markdown(content)
-                self.show_html(html)
-            elif ext == ".csv":
-                table = self.csv_to_table(content)
-                self.show_text(table)
-            elif ext == ".json":
-                formatted_json = json.dumps(json.loads(content), indent=2)
-                self.show_text(formatted_json)
+            if ext == ".csv":
+                # CSV is always streamed from the file, whatever its size
+                if self.source is None:
+                    self.source = LocalFileSource(self.file_path)
+                self.show_csv(self.source)
+                return
+            if ext in (".json", ".ndjson", ".jsonl"):
+                # JSON is scanned lazily from the file and parsed only as it is expanded
+                if self.source is None:
+                    self.source = LocalFileSource(self.file_path)
+                self.show_json(self.source, json_lines=ext != ".json")
+                return
+            if self.source is None and os.path.getsize(self.file_path) > self.LARGE_FILE_LIMIT:
+                self.source = LocalFileSource(self.file_path)
+                self.line_index = LineIndex(self.source)
+            if self.source is not None and self.source.size > self.SMALL_FILE_LIMIT:
+                self.show_windowed(self.source)
+                return
+
+            renderer = RENDERERS.get(ext, "code")
+            if self.render_cache is not None and self.source is None:
+                self.render_key = self.render_cache.make_key(self.file_path, renderer, self.style)
+                self.rendered = self.render_cache.get(self.render_key)
+            if self.rendered is None:
+                self.rendered = self.render(renderer, self.read_content())
+                if self.render_key is not None:
+                    self.render_cache.put(self.render_key, self.rendered)
+
+            if renderer == "markdown":
+                self.show_html(self.rendered["html"])
             else:
-                lexer = guess_lexer(content)
-                highlighted = highlight(content, lexer, HtmlFormatter(style="default"))
-                self.show_html(highlighted)
+                self.show_code(self.rendered)
         except Exception as e:
             self.show_text(f"Error opening file: {str(e)}")
 
+    def render(self, renderer, content):
+        if renderer == "markdown":
+            return {"html": markdown.markdown(content)}
+        # Code is tokenized lazily by the highlighter; the runs it completed are cached on close
+        return {"text": content, "runs": None, "tag_styles": None, "runs_end": None}
+
+    def read_content(self):
+        if self.source is not None:
+            return self.source.read(0, self.source.size).decode("utf-8")
+        with open(self.file_path, "r", encoding="utf-8") as file:
+            return file.read()
+
+    def close(self):
+        if self.render_key is not None and self.highlighter is not None:
+            snapshot = self.highlighter.snapshot()
+            if snapshot is not None and self.covers_more(snapshot[2]):
+                runs, tag_styles, runs_end = snapshot
+                self.render_cache.put(self.render_key, dict(self.rendered, runs=runs, tag_styles=tag_styles, runs_end=runs_end))
+        if self.line_index is not None:
+            self.line_index.stop()
+            self.line_index.thread.join(timeout=1)
+        if self.grid_view is not None:
+            self.grid_view.stop()
+            self.grid_view.row_index.thread.join(timeout=1)
+        if self.json_view is not None:
+            self.json_view.stop()
+        if self.follow_view is not None:
+            self.follow_view.stop()
+        if self.source is not None:
+            self.source.close()
+        self.window.destroy()
+
+    def covers_more(self, runs_end):
+        # Whether a highlighter snapshot ending at runs_end extends the cached runs
+        if self.rendered["runs"] is None:
+            return True
+        cached_end = self.rendered.get("runs_end")
+        return cached_end is not None and (runs_end is None or runs_end > cached_end)
+
+    def show_windowed(self, source):
+        view = WindowedTextView(self.window, source, self.line_index)
+        view.pack(fill=tk.BOTH, expand=True)
+
+    def show_csv(self, source):
+        self.grid_view = CsvGridView(self.window, source)
+        self.grid_view.pack(fill=tk.BOTH, expand=True)
+
+    def show_json(self, source, json_lines=False):
+        self.json_view = JsonTreeView(self.window, source, json_lines)
+        self.json_view.pack(fill=tk.BOTH, expand=True)
+
+    def show_follow(self, sftp=None):
+        # A given SFTP session is handed to the follower, which closes it when it stops
+        self.window.title(f"Follow - {self.file_path}")
+        self.follow_view = FollowView(self.window, self.file_path, sftp)
+        self.follow_view.pack(fill=tk.BOTH, expand=True)
+
     def show_html(self, content):
         html_label = HTMLLabel(self.window, html=content)
         html_label.pack(fill=tk.BOTH, expand=True)
@@ -50,9 +151,636 @@ class FileViewer:
         text = tk.Text(self.window, wrap=tk.WORD, bg="white", fg="black")
         text.pack(fill=tk.BOTH, expand=True)
         text.insert(tk.END, content)
+        return text
+
+    def show_code(self, rendered):
+        # Tokens are tagged as they scroll into view instead of rendering the whole file up front
+        content = rendered["text"]
+        text = self.show_text(content)
+        text.configure(wrap=tk.NONE)
+        runs_end = rendered.get("runs_end")
+        if rendered["runs"] is not None and runs_end is None:
+            self.highlighter = SyntaxHighlighter(text, None, content, self.style, rendered["runs"], rendered["tag_styles"])
+        else:
+            # No runs, or only a cached prefix: the lexer is needed for the rest
+            self.highlighter = SyntaxHighlighter(text, lexer_for_file(self.file_path, content), content, self.style,
+                                                 rendered["runs"], rendered["tag_styles"], runs_end)
+
+class WindowedTextView(ttk.Frame):
+    # Shows one screen of a byte source at a time; the source is read on demand, so
+    # memory use depends on the window size rather than the file size.
+    STATUS_INTERVAL = 250  # ms
+
+    def __init__(self, parent, source, line_index=None):
+        super().__init__(parent)
+        self.source = source
+        self.line_index = line_index
+        self.offset = 0  # byte offset of the first visible line
+        self.shown_bytes = 0
+        self.create_widgets()
+        self.render()
+        if self.line_index is not None:
+            self.update_status()
+
+    def create_widgets(self):
+        self.text = tk.Text(self, wrap=tk.NONE, bg="white", fg="black")
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.status = ttk.Label(self, anchor=tk.W)
+        self.status.pack(side=tk.BOTTOM, fill=tk.X)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.line_height = font.Font(font=self.text.cget("font")).metrics("linespace")
+
+        self.text.bind("<Configure>", lambda event: self.render())
+        self.text.bind("<MouseWheel>", lambda event: self.scroll_lines(-3 if event.delta > 0 else 3))
+        self.text.bind("<Button-4>", lambda event: self.scroll_lines(-3))
+        self.text.bind("<Button-5>", lambda event: self.scroll_lines(3))
+        self.text.bind("<Up>", lambda event: self.scroll_lines(-1))
+        self.text.bind("<Down>", lambda event: self.scroll_lines(1))
+        self.text.bind("<Prior>", lambda event: self.scroll_lines(1 - self.visible_lines()))
+        self.text.bind("<Next>", lambda event: self.scroll_lines(self.visible_lines() - 1))
+        self.text.bind("<Control-Home>", lambda event: self.go_to_offset(0))
+        self.text.bind("<Control-End>", lambda event: self.go_to_end())
+        self.text.bind("<Control-g>", self.ask_line)
+        self.text.focus_set()
+
+    def visible_lines(self):
+        height = self.text.winfo_height()
+        if height <= 1:
+            return int(self.text.cget("height"))
+        return max(1, height // self.line_height)
+
+    def render(self):
+        data = self.source.read(self.offset, WINDOW_BYTES)
+        lines = data.split(b"\n")[:self.visible_lines()]
+        self.shown_bytes = min(len(data), sum(len(line) + 1 for line in lines))
+        self.text.configure(state=tk.NORMAL)
+        self.text.delete("1.0", tk.END)
+        self.text.insert(tk.END, b"\n".join(lines).decode("utf-8", errors="replace"))
+        self.text.configure(state=tk.DISABLED)
+        self.update_scrollbar()
+        if self.line_index is not None and self.line_index.complete:
+            self.update_status()
+        return "break"
+
+    def update_scrollbar(self):
+        size = max(self.source.size, 1)
+        self.scrollbar.set(self.offset / size, (self.offset + self.shown_bytes) / size)
+
+    def on_scrollbar(self, action, value, unit=None):
+        if action == tk.MOVETO:
+            self.go_to_offset(int(float(value) * self.source.size))
+        elif unit == tk.PAGES:
+            self.scroll_lines(int(value) * (self.visible_lines() - 1))
+        else:
+            self.scroll_lines(int(value))
+
+    def scroll_lines(self, count):
+        if count > 0:
+            if self.offset + self.shown_bytes >= self.source.size:
+                return "break"
+            in_long_line = False
+            while count > 0:
+                data = self.source.read(self.offset, WINDOW_BYTES)
+                position = -1
+                while count > 0:
+                    found = data.find(b"\n", position + 1)
+                    if found == -1 or self.offset + found + 1 >= self.source.size:
+                        break
+                    position = found
+                    count -= 1
+                if position == -1:
+                    if found != -1 or len(data) < WINDOW_BYTES:
+                        break
+                    # A line longer than the window: step through it a window at a time
+                    self.offset += len(data)
+                    count -= 1
+                    in_long_line = True
+                    continue
+                self.offset += position + 1
+                in_long_line = False
+            if not in_long_line:
+                # Scanning back for the last screen would only return to the long line's start
+                self.offset = min(self.offset, self.line_start_before(self.source.size, self.visible_lines()))
+        elif count < 0:
+            self.offset = self.line_start_before(self.offset, -count)
+        return self.render()
+
+    def line_start_before(self, offset, count):
+        # Byte offset of the line starting `count` lines above the line at `offset`
+        skip_newline = True
+        while count > 0 and offset > 0:
+            start = max(0, offset - SCAN_BYTES)
+            data = self.source.read(start, offset - start)
+            # Skip the newline that ends the line above `offset`
+            end = len(data) - 1 if skip_newline and data.endswith(b"\n") else len(data)
+            skip_newline = False
+            while count > 0:
+                found = data.rfind(b"\n", 0, end)
+                if found == -1:
+                    break
+                end = found
+                count -= 1
+            if count == 0:
+                return start + end + 1
+            if start == 0:
+                return 0
+            offset = start
+        return offset
+
+    def go_to_offset(self, offset):
+        offset = max(0, min(offset, self.source.size))
+        if offset > 0:
+            start = max(0, offset - SCAN_BYTES)
+            newline = self.source.read(start, offset - start).rfind(b"\n")
+            if newline != -1:
+                offset = start + newline + 1
+            elif start == 0:
+                offset = 0
+        self.offset = offset
+        return self.render()
+
+    def go_to_end(self):
+        if self.line_index is not None and self.line_index.complete:
+            last_line = max(0, self.line_index.line_count() - self.visible_lines())
+            self.offset = self.line_index.line_offset(last_line)
+        else:
+            self.offset = self.line_start_before(self.source.size, self.visible_lines())
+        return self.render()
+
+    def ask_line(self, event=None):
+        if self.line_index is None:
+            return "break"
+        line = simpledialog.askinteger("Go to Line", "Line number:", parent=self, minvalue=1)
+        if line is not None:
+            self.go_to_line(line - 1)
+        return "break"
+
+    def go_to_line(self, line):
+        offset = self.line_index.line_offset(line)
+        if offset is None:
+            self.status.configure(text=f"Line {line + 1} is not indexed yet")
+            return
+        self.offset = offset
+        self.render()
+
+    def update_status(self):
+        if not self.winfo_exists():
+            return
+        index = self.line_index
+        line = f"{index.line_at_offset(self.offset) + 1:,}" if self.offset <= index.indexed_bytes else "?"
+        if index.complete:
+            self.status.configure(text=f"Line {line} of {index.line_count():,}")
+        else:
+            percent = index.indexed_bytes * 100 // max(self.source.size, 1)
+            self.status.configure(text=f"Line {line} of {index.line_count():,}+ (indexing {percent}%)")
+            self.after(self.STATUS_INTERVAL, self.update_status)
+
+class CsvGridView(ttk.Frame):
+    # Shows a page of CSV records in a Treeview. Records are read from the byte source by
+    # offset, so only the visible rows and columns are ever parsed or inserted.
+    COLUMN_WINDOW = 12  # columns shown at once
+    ROW_BATCH = 10000  # records parsed per read when sorting or filtering
+    STATUS_INTERVAL = 250  # ms
+
+    def __init__(self, parent, source):
+        super().__init__(parent)
+        self.source = source
+        self.row_index = RowIndex(source)
+        self.header = []
+        self.top = 0  # first visible display position
+        self.first_column = 0
+        self.order = None  # data row numbers in sorted order, or None for file order
+        self.sort_column = None
+        self.descending = False
+        self.view_rows = None  # data row numbers after sorting and filtering, or None for all rows
+        self.task = None
+        self.task_counter = 0
+        self.polling = False
+        self.results = queue.Queue()
+        self.create_widgets()
+        self.update_status()
+
+    def create_widgets(self):
+        filter_bar = ttk.Frame(self)
+        filter_bar.pack(side=tk.TOP, fill=tk.X)
+        ttk.Label(filter_bar, text="Filter:").pack(side=tk.LEFT)
+        self.filter_entry = ttk.Entry(filter_bar)
+        self.filter_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.filter_entry.bind("<Return>", lambda event: self.apply_filter())
+
+        self.status = ttk.Label(self, anchor=tk.W)
+        self.status.pack(side=tk.BOTTOM, fill=tk.X)
+        self.column_scrollbar = ttk.Scrollbar(self, orient=tk.HORIZONTAL, command=self.on_column_scrollbar)
+        self.column_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        slots = [f"c{slot}" for slot in range(self.COLUMN_WINDOW)]
+        self.tree = ttk.Treeview(self, columns=slots, show="headings", selectmode="browse")
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        for slot, column_id in enumerate(slots):
+            self.tree.heading(column_id, command=lambda slot=slot: self.sort_by(self.first_column + slot))
+            self.tree.column(column_id, width=120, stretch=True)
+        self.row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+
+        self.tree.bind("<Configure>", lambda event: self.render())
+        self.tree.bind("<MouseWheel>", lambda event: self.scroll_rows(-3 if event.delta > 0 else 3))
+        self.tree.bind("<Button-4>", lambda event: self.scroll_rows(-3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll_rows(3))
+        self.tree.bind("<Up>", lambda event: self.scroll_rows(-1))
+        self.tree.bind("<Down>", lambda event: self.scroll_rows(1))
+        self.tree.bind("<Prior>", lambda event: self.scroll_rows(1 - self.visible_rows()))
+        self.tree.bind("<Next>", lambda event: self.scroll_rows(self.visible_rows() - 1))
+        self.tree.bind("<Left>", lambda event: self.scroll_columns(-1))
+        self.tree.bind("<Right>", lambda event: self.scroll_columns(1))
+        self.tree.bind("<Control-Home>", lambda event: self.scroll_rows(-self.row_count()))
+        self.tree.bind("<Control-End>", lambda event: self.scroll_rows(self.row_count()))
+        self.tree.focus_set()
+
+    def visible_rows(self):
+        height = self.tree.winfo_height()
+        if height <= 1:
+            return 20
+        return max(1, height // self.row_height - 1)  # one row's worth is taken by the headings
+
+    def row_count(self):
+        if self.view_rows is not None:
+            return len(self.view_rows)
+        return max(0, self.row_index.row_count() - 1)  # record 0 is the header
+
+    def row_number(self, position):
+        return self.view_rows[position] if self.view_rows is not None else position + 1
+
+    def read_rows(self, rows):
+        # Consecutive records are read with one call; sorted or filtered views read each one
+        if not rows:
+            return []
+        if rows[-1] - rows[0] == len(rows) - 1:
+            start, _ = self.row_index.row_range(rows[0])
+            _, end = self.row_index.row_range(rows[-1])
+            data = self.source.read(start, end - start).decode("utf-8", errors="replace")
+            return list(csv.reader(io.StringIO(data, newline="")))
+        result = []
+        for row in rows:
+            start, end = self.row_index.row_range(row)
+            data = self.source.read(start, end - start).decode("utf-8", errors="replace")
+            result.append(next(csv.reader(io.StringIO(data, newline="")), []))
+        return result
+
+    def render(self):
+        if not self.header and self.row_index.row_count() > 0:
+            self.header = self.read_rows([0])[0]
+        count = self.row_count()
+        self.top = max(0, min(self.top, count - self.visible_rows()))
+        end = min(count, self.top + self.visible_rows())
+        rows = self.read_rows([self.row_number(position) for position in range(self.top, end)])
+
+        columns = slice(self.first_column, self.first_column + self.COLUMN_WINDOW)
+        for slot in range(self.COLUMN_WINDOW):
+            index = self.first_column + slot
+            title = self.header[index] if index < len(self.header) else ""
+            if index == self.sort_column:
+                title += " ▼" if self.descending else " ▲"
+            self.tree.heading(f"c{slot}", text=title)
+        self.tree.delete(*self.tree.get_children())
+        for row in rows:
+            self.tree.insert("", tk.END, values=row[columns])
+
+        size = max(count, 1)
+        self.scrollbar.set(self.top / size, end / size)
+        column_count = max(len(self.header), 1)
+        self.column_scrollbar.set(self.first_column / column_count,
+                                  min(1.0, (self.first_column + self.COLUMN_WINDOW) / column_count))
+        self.show_status(end)
+        return "break"
+
+    def show_status(self, end):
+        count = self.row_count()
+        text = f"Rows {self.top + 1 if count else 0:,}-{end:,} of {count:,}"
+        if not self.row_index.complete:
+            percent = self.row_index.indexed_bytes * 100 // max(self.source.size, 1)
+            text += f"+ (indexing {percent}%)"
+        if self.task:
+            text += f" - {self.task}..."
+        self.status.configure(text=text)
+
+    def on_scrollbar(self, action, value, unit=None):
+        if action == tk.MOVETO:
+            self.top = int(float(value) * self.row_count())
+            self.render()
+        elif unit == tk.PAGES:
+            self.scroll_rows(int(value) * (self.visible_rows() - 1))
+        else:
+            self.scroll_rows(int(value))
+
+    def on_column_scrollbar(self, action, value, unit=None):
+        if action == tk.MOVETO:
+            self.first_column = 0
+            self.scroll_columns(int(float(value) * len(self.header)))
+        elif unit == tk.PAGES:
+            self.scroll_columns(int(value) * self.COLUMN_WINDOW)
+        else:
+            self.scroll_columns(int(value))
+
+    def scroll_rows(self, count):
+        self.top = max(0, self.top + count)
+        return self.render()
+
+    def scroll_columns(self, count):
+        last = max(0, len(self.header) - self.COLUMN_WINDOW)
+        self.first_column = max(0, min(self.first_column + count, last))
+        return self.render()
+
+    def sort_by(self, column):
+        if column >= len(self.header):
+            return
+        self.descending = column == self.sort_column and not self.descending
+        self.sort_column = column
+        self.start_task("Sorting", self.build_order, column, self.descending, self.filter_entry.get())
+
+    def apply_filter(self):
+        self.start_task("Filtering", self.build_order, self.sort_column, self.descending, self.filter_entry.get())
+
+    def start_task(self, label, target, *args):
+        # A newer sort or filter supersedes any that is still running
+        self.task_counter += 1
+        self.task = label
+        threading.Thread(target=target, args=(self.task_counter,) + args, daemon=True).start()
+        if not self.polling:
+            self.update_status()
+
+    def iter_records(self, task_id):
+        # Yields (row number, fields) for every data record, in file order
+        count = self.row_index.row_count()
+        for first in range(1, count, self.ROW_BATCH):
+            if task_id != self.task_counter or self.row_index.cancelled:
+                return
+            last = min(count, first + self.ROW_BATCH)
+            yield from enumerate(self.read_rows(range(first, last)), first)
+
+    def build_order(self, task_id, column, descending, needle):
+        self.row_index.thread.join()
+        needle = needle.lower()
+        keys = []
+        matches = bytearray(self.row_index.row_count()) if needle else None
+        for row, fields in self.iter_records(task_id):
+            if column is not None:
+                keys.append(fields[column] if column < len(fields) else "")
+            if needle and needle in "\x1f".join(fields).lower():
+                matches[row] = 1
+        if task_id != self.task_counter:
+            return
+        rows = range(1, self.row_index.row_count())
+        if column is not None:
+            try:
+                numeric = [float(key) if key else float("-inf") for key in keys]
+                keys = numeric
+            except ValueError:
+                pass
+            rows = sorted(rows, key=lambda row: keys[row - 1], reverse=descending)
+        if needle:
+            rows = (row for row in rows if matches[row])
+        view_rows = array.array("Q", rows) if column is not None or needle else None
+        self.results.put((task_id, view_rows))
+
+    def update_status(self):
+        self.polling = False
+        if not self.winfo_exists():
+            return
+        try:
+            while True:
+                task_id, view_rows = self.results.get_nowait()
+                if task_id == self.task_counter:
+                    self.view_rows = view_rows
+                    self.task = None
+                    self.top = 0
+        except queue.Empty:
+            pass
+        self.render()
+        if not self.row_index.complete or self.task:
+            self.polling = True
+            self.after(self.STATUS_INTERVAL, self.update_status)
+
+    def stop(self):
+        self.task_counter += 1
+        self.row_index.stop()
+
+class JsonTreeView(ttk.Frame):
+    # Values are located by byte span and decoded only when shown. A container lists its
+    # children when expanded, a page at a time, and forgets them again when collapsed.
+    PAGE_SIZE = 500  # children listed before the scan pauses for "more"
+    BATCH_SIZE = 100  # children handed to the UI per message
+    POLL_INTERVAL = 20  # ms
+
+    def __init__(self, parent, source, json_lines=False):
+        super().__init__(parent)
+        self.scanner = JsonScanner(source)
+        self.spans = {}  # item -> (start, end) of its value
+        self.listings = {}
+        self.load_counter = 0
+        self.results = queue.Queue()
+        self.create_widgets()
+        if json_lines:
+            self.load_children("", self.scanner.iter_lines(), "array")
+        else:
+            start = self.scanner.value_start()
+            if start < source.size:
+                root = self.add_item("", "(root)", start, source.size)
+                if root in self.spans:
+                    self.tree.item(root, open=True)
+                    self.open_item(root)
+        self.after(self.POLL_INTERVAL, self.poll_children)
+
+    def create_widgets(self):
+        self.tree = ttk.Treeview(self, columns=("value",))
+        scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.tree.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.heading("#0", text="Key", anchor=tk.W)
+        self.tree.heading("value", text="Value", anchor=tk.W)
+        self.tree.column("#0", width=220, stretch=False)
+        self.tree.bind("<<TreeviewOpen>>", lambda event: self.open_item(self.tree.focus()))
+        self.tree.bind("<<TreeviewClose>>", lambda event: self.close_item(self.tree.focus()))
+        self.tree.bind("<Double-1>", self.on_double_click)
+
+    def add_item(self, parent, key, start, end):
+        kind = self.scanner.kind(start, end)
+        if kind == "scalar":
+            return self.tree.insert(parent, tk.END, text=str(key), values=(self.scanner.preview(start, end),))
+        item = self.tree.insert(parent, tk.END, text=str(key), values=("{…}" if kind == "object" else "[…]",))
+        self.tree.insert(item, tk.END, text="", tags=("placeholder",))
+        self.spans[item] = (start, end)
+        return item
+
+    def open_item(self, item):
+        children = self.tree.get_children(item)
+        if item not in self.spans or item in self.listings:
+            return
+        if len(children) == 1 and "placeholder" in self.tree.item(children[0], "tags"):
+            self.tree.delete(children[0])
+            start, end = self.spans[item]
+            self.load_children(item, self.scanner.iter_children(start), self.scanner.kind(start, end))
+
+    def close_item(self, item):
+        if item not in self.spans:
+            return
+        self.cancel_listing(item)
+        self.forget(self.tree.get_children(item))
+        self.tree.delete(*self.tree.get_children(item))
+        self.tree.insert(item, tk.END, text="", tags=("placeholder",))
+
+    def forget(self, items):
+        for item in items:
+            self.cancel_listing(item)
+            self.spans.pop(item, None)
+            self.forget(self.tree.get_children(item))
+
+    def load_children(self, item, children, kind):
+        self.load_counter += 1
+        listing = {
+            "token": self.load_counter,
+            "kind": kind,
+            "limit": self.PAGE_SIZE,
+            "count": 0,
+            "resume": threading.Event(),
+            "cancelled": False,
+            "loading": self.tree.insert(item, tk.END, text="Loading…", tags=("placeholder",)),
+            "more": None,
+        }
+        self.listings[item] = listing
+        threading.Thread(target=self.scan_children, args=(item, listing, children), daemon=True).start()
+
+    def scan_children(self, item, listing, children):
+        # Runs on a worker thread and pauses after each page until more are requested
+        page = []
+        sent = 0
+        try:
+            for child in children:
+                page.append(child)
+                sent += 1
+                if len(page) >= self.BATCH_SIZE or sent >= listing["limit"]:
+                    self.results.put((item, listing["token"], page, False))
+                    page = []
+                while sent >= listing["limit"] and not listing["cancelled"]:
+                    listing["resume"].wait()
+                    listing["resume"].clear()
+                if listing["cancelled"]:
+                    return
+        except Exception:
+            pass  # A truncated document, a closed source or a dropped SSH link ends the listing
+        finally:
+            # Always sent, so "Loading…" is replaced whatever stopped the scan
+            self.results.put((item, listing["token"], page, True))
+
+    def poll_children(self):
+        if not self.winfo_exists():
+            return
+        while True:
+            try:
+                item, token, page, done = self.results.get_nowait()
+            except queue.Empty:
+                break
+            listing = self.listings.get(item)
+            if not listing or listing["token"] != token:
+                continue  # The item was collapsed meanwhile
+            for key, start, end in page:
+                self.add_item(item, f"[{key}]" if listing["kind"] == "array" else key, start, end)
+            listing["count"] += len(page)
+            self.update_listing(item, listing, done)
+        self.after(self.POLL_INTERVAL, self.poll_children)
+
+    def update_listing(self, item, listing, done):
+        if listing["loading"] is not None:
+            self.tree.delete(listing["loading"])
+            listing["loading"] = None
+        count = listing["count"]
+        unit = "keys" if listing["kind"] == "object" else "items"
+        summary = f"{count:,} {unit}" if done else f"{count:,}+ {unit}"
+        if item:
+            self.tree.item(item, values=("{" + summary + "}" if listing["kind"] == "object" else "[" + summary + "]",))
+        if done:
+            if listing["more"] is not None:
+                self.tree.delete(listing["more"])
+            del self.listings[item]
+        elif count >= listing["limit"]:
+            if listing["more"] is None:
+                listing["more"] = self.tree.insert(item, tk.END, text="More…", tags=("more",))
+            else:
+                self.tree.move(listing["more"], item, tk.END)
+
+    def on_double_click(self, event):
+        item = self.tree.identify_row(event.y)
+        if item and "more" in self.tree.item(item, "tags"):
+            listing = self.listings.get(self.tree.parent(item))
+            if listing:
+                listing["limit"] += self.PAGE_SIZE
+                listing["resume"].set()
+            return "break"
+
+    def cancel_listing(self, item):
+        listing = self.listings.pop(item, None)
+        if listing:
+            listing["cancelled"] = True
+            listing["resume"].set()
+
+    def stop(self):
+        for item in list(self.listings):
+            self.cancel_listing(item)
+
+class FollowView(ttk.Frame):
+    # Shows a growing file like `tail -f`. Lines beyond the limits are trimmed from the top,
+    # so memory stays flat however long the file is followed.
+    POLL_INTERVAL = 100  # ms
+    MAX_LINES = 10000
+    MAX_CHARS = 4 * 1024 * 1024
+
+    def __init__(self, parent, path, sftp=None):
+        super().__init__(parent)
+        self.path = path
+        self.follower = FileFollower(path, sftp)
+        self.received = 0
+        self.create_widgets()
+        self.scrollback = Scrollback(self.text, self.MAX_LINES, self.MAX_CHARS)
+        self.after(self.POLL_INTERVAL, self.poll)
+
+    def create_widgets(self):
+        self.status = ttk.Label(self, anchor=tk.W)
+        self.status.pack(side=tk.BOTTOM, fill=tk.X)
+        scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.text = tk.Text(self, wrap=tk.NONE, bg="white", fg="black", yscrollcommand=scrollbar.set)
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.configure(command=self.text.yview)
+        self.text.tag_configure("event", foreground="gray")
+        self.status.configure(text=f"Following {self.path}")
+
+    def poll(self):
+        if not self.winfo_exists():
+            return
+        items = self.follower.read_output()
+        if items:
+            # Stay pinned to the end unless the user has scrolled up
+            at_end = self.text.yview()[1] >= 1.0
+            self.text.configure(state=tk.NORMAL)
+            for item in items:
+                if isinstance(item, str):
+                    self.append(item)
+                    self.received += len(item)
+                elif item[0] == "error":
+                    self.append(f"\n--- {item[1]} ---\n", "event")
+                else:
+                    self.append(f"\n--- file {item[0]} ---\n", "event")
+            self.text.configure(state=tk.DISABLED)
+            if at_end:
+                self.text.see(tk.END)
+            self.status.configure(text=f"Following {self.path} ({self.received:,} characters received)")
+        self.after(self.POLL_INTERVAL, self.poll)
+
+    def append(self, text, tag=None):
+        self.text.insert("end-1c", text, tag)
+        self.scrollback.append()
 
-    def csv_to_table(self, content):
-        table = []
-        for row in csv.reader(content.splitlines()):
-            table.append(" | ".join(row))
-        return "\n".join(table)
\ No newline at end of file
+    def stop(self):
+        self.follower.stop()
@@ -0,0 +1,274 @@
+import queue
+import re
+import threading
+import tkinter as tk
+from tkinter import ttk
+from utils.search_index import SearchJob
+
+class FindBar(ttk.Frame):
+    # Search over the terminal's scrollback. The query is re-run as it is typed: matches in
+    # view are found and highlighted straight away, the rest of the index is searched in
+    # idle callbacks while the count catches up. Only the visible matches are tagged.
+    # Lines trimmed into the scrollback's spill file are searched on a worker thread once
+    # typing pauses; their matches are counted and can be listed, but not scrolled to.
+    TIME_SLICE = 0.008  # seconds of searching per idle callback
+    VIEW_POLL_INTERVAL = 50  # ms
+    SPILL_DELAY = 300  # ms of no typing before the spill file is searched
+    SPILL_POLL_INTERVAL = 100  # ms
+    MAX_SPILLED_SHOWN = 1000
+
+    def __init__(self, parent, widget, index, scrollback=None):
+        super().__init__(parent)
+        self.widget = widget
+        self.index = index
+        self.scrollback = scrollback
+        self.job = None
+        self.current = None  # the selected match
+        self.search_scheduled = False
+        self.view = None  # last highlighted (first line, last line, first session line)
+        self.spill_results = queue.Queue()
+        self.spill_token = 0  # bumped for every spill search; stale results are dropped
+        self.spill_job = None
+        self.spill_poll_job = None
+        self.spill_scans = 0  # scans started but not yet reported
+        self.spilled = None  # (match count, first matching (line number, line)s) once searched
+        self.spilled_through = 0  # trimmed line count the last spill search started from
+        self.create_widgets()
+        self.widget.tag_configure("search_match", background="#5c5000", foreground="white")
+        self.widget.tag_configure("search_current", background="#ffd700", foreground="black")
+        self.widget.tag_raise("search_current", "search_match")
+
+    def create_widgets(self):
+        self.query = tk.StringVar(self)
+        self.use_regex = tk.BooleanVar(self, value=False)
+        self.match_case = tk.BooleanVar(self, value=False)
+        self.entry = ttk.Entry(self, textvariable=self.query, width=40)
+        self.entry.pack(side=tk.LEFT, padx=2, pady=2)
+        ttk.Checkbutton(self, text="Regex", variable=self.use_regex, command=self.restart).pack(side=tk.LEFT)
+        ttk.Checkbutton(self, text="Match case", variable=self.match_case, command=self.restart).pack(side=tk.LEFT)
+        ttk.Button(self, text="Previous", command=self.find_previous).pack(side=tk.LEFT)
+        ttk.Button(self, text="Next", command=self.find_next).pack(side=tk.LEFT)
+        self.count_label = ttk.Label(self, width=44)
+        self.count_label.pack(side=tk.LEFT, padx=6)
+        self.spilled_button = ttk.Button(self, text="Spilled Matches", command=self.show_spilled, state=tk.DISABLED)
+        self.spilled_button.pack(side=tk.LEFT)
+        ttk.Button(self, text="Close", command=self.hide).pack(side=tk.RIGHT)
+        self.query.trace_add("write", lambda *args: self.restart())
+        self.entry.bind("<Return>", self.find_next)
+        self.entry.bind("<Shift-Return>", self.find_previous)
+        self.entry.bind("<Escape>", self.hide)
+
+    def show(self, event=None):
+        if not self.winfo_ismapped():
+            self.pack(side=tk.BOTTOM, fill=tk.X, before=self.widget)
+            self.after(self.VIEW_POLL_INTERVAL, self.poll_view)
+        self.entry.focus_set()
+        self.entry.select_range(0, tk.END)
+        self.restart()
+        return "break"
+
+    def hide(self, event=None):
+        self.pack_forget()
+        self.job = None
+        self.current = None
+        self.cancel_spilled()
+        self.clear_highlights()
+        self.widget.focus_set()
+        return "break"
+
+    def restart(self):
+        pattern = self.query.get()
+        self.current = None
+        self.cancel_spilled()
+        if not pattern:
+            self.job = None
+            self.clear_highlights()
+            self.count_label.configure(text="")
+            return
+        try:
+            self.job = SearchJob(self.index, pattern, regex=self.use_regex.get(), case=self.match_case.get(),
+                                 start_line=self.visible_lines()[0], previous=self.job)
+        except re.error as e:
+            self.job = None
+            self.clear_highlights()
+            self.count_label.configure(text=f"Invalid pattern: {e.msg}")
+            return
+        self.highlight_view()
+        self.schedule()
+        self.schedule_spilled()
+
+    def schedule(self):
+        if not self.search_scheduled:
+            self.search_scheduled = True
+            self.after_idle(self.run)
+
+    def run(self):
+        self.search_scheduled = False
+        if self.job is None:
+            return
+        if not self.job.step(self.TIME_SLICE):
+            self.schedule()
+        self.show_count()
+
+    def on_output(self, first_block):
+        # Called after each rendered chunk, once the index has the new text
+        if self.job is None:
+            return
+        self.job.trim()
+        self.job.invalidate(first_block)
+        self.view = None
+        self.schedule()
+        if self.scrollback is not None and self.scrollback.trimmed_lines != self.spilled_through:
+            self.schedule_spilled()  # More lines went to the spill file
+
+    def show_count(self):
+        if self.job is None:
+            return
+        total = self.job.total
+        if not self.job.finished:
+            text = f"{total:,}+ matches"
+        elif self.current is not None and self.job.rank(self.current) is not None:
+            text = f"{self.job.rank(self.current):,} of {total:,}"
+        else:
+            text = f"{total:,} match" + ("" if total == 1 else "es")
+        if self.spilled is not None and self.spilled[0]:
+            text += f" (+{self.spilled[0]:,} in spilled history)"
+        self.count_label.configure(text=text)
+
+    def schedule_spilled(self):
+        # Waits for typing to pause, so each keystroke does not rescan the whole file
+        if self.scrollback is None or not self.scrollback.spill_path:
+            return
+        if self.spill_job is not None:
+            self.after_cancel(self.spill_job)
+        self.spill_job = self.after(self.SPILL_DELAY, self.search_spilled)
+
+    def search_spilled(self):
+        self.spill_job = None
+        if self.job is None or not self.scrollback.spill_path:
+            return
+        self.spill_token += 1
+        self.spilled_through = self.scrollback.trimmed_lines
+        pattern = self.job.pattern if not self.job.literal else re.escape(self.job.pattern)
+        flags = 0 if self.job.case else re.IGNORECASE
+        self.spill_scans += 1
+        threading.Thread(target=self.scan_spilled, args=(self.spill_token, pattern, flags), daemon=True).start()
+        if self.spill_poll_job is None:
+            self.spill_poll_job = self.after(self.SPILL_POLL_INTERVAL, self.poll_spilled)
+
+    def scan_spilled(self, token, pattern, flags):
+        # Always reports back, even when superseded, so poll_spilled knows the scan is over
+        count, lines = 0, []
+        try:
+            for line_number, line in self.scrollback.search_spilled(pattern, flags):
+                if token != self.spill_token:
+                    break  # Superseded by a newer query
+                count += 1
+                if len(lines) < self.MAX_SPILLED_SHOWN:
+                    lines.append((line_number, line))
+        except (EOFError, OSError):
+            pass  # The file is appended to while we read it; report what was read
+        self.spill_results.put((token, count, lines))
+
+    def poll_spilled(self):
+        self.spill_poll_job = None
+        while True:
+            try:
+                token, count, lines = self.spill_results.get_nowait()
+            except queue.Empty:
+                break
+            self.spill_scans -= 1
+            if token == self.spill_token:
+                self.spilled = (count, lines)
+                self.spilled_button.configure(state=tk.NORMAL if count else tk.DISABLED)
+                self.show_count()
+        if self.spill_scans:
+            self.spill_poll_job = self.after(self.SPILL_POLL_INTERVAL, self.poll_spilled)
+
+    def cancel_spilled(self):
+        if self.spill_job is not None:
+            self.after_cancel(self.spill_job)
+            self.spill_job = None
+        if self.spill_poll_job is not None:
+            self.after_cancel(self.spill_poll_job)
+            self.spill_poll_job = None
+        self.spill_token += 1
+        self.spilled = None
+        self.spilled_button.configure(state=tk.DISABLED)
+
+    def show_spilled(self):
+        if not self.spilled:
+            return
+        count, lines = self.spilled
+        window = tk.Toplevel(self)
+        window.title(f"Spilled Matches - {self.query.get()}")
+        window.geometry("800x400")
+        text = tk.Text(window, wrap=tk.NONE)
+        scrollbar = ttk.Scrollbar(window, orient=tk.VERTICAL, command=text.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        text.configure(yscrollcommand=scrollbar.set)
+        if count > len(lines):
+            text.insert(tk.END, f"First {len(lines):,} of {count:,} matches\n")
+        text.insert(tk.END, "\n".join(f"{line_number}: {line}" for line_number, line in lines))
+        text.configure(state=tk.DISABLED)
+
+    def find_next(self, event=None):
+        self.move(backwards=False)
+        return "break"
+
+    def find_previous(self, event=None):
+        self.move(backwards=True)
+        return "break"
+
+    def move(self, backwards):
+        if self.job is None:
+            return
+        if self.current is not None and self.current[0] >= self.index.first_line:
+            position = self.current[:2]
+        else:
+            line, column = map(int, self.widget.index(tk.INSERT).split("."))
+            position = (line - 1 + self.index.first_line, column)
+        match = self.job.next_match(position, backwards)
+        if match is None:
+            return
+        self.current = match
+        self.widget.see(self.widget_index(match[2], match[3]))
+        self.widget.see(self.widget_index(match[0], match[1]))
+        self.view = None
+        self.highlight_view()
+        self.show_count()
+
+    def widget_index(self, line, column):
+        return f"{line - self.index.first_line + 1}.{column}"
+
+    def visible_lines(self):
+        # Session line numbers of the first and last lines in view
+        first = int(self.widget.index("@0,0").split(".")[0])
+        last = int(self.widget.index(f"@0,{self.widget.winfo_height()}").split(".")[0])
+        return first - 1 + self.index.first_line, last - 1 + self.index.first_line
+
+    def poll_view(self):
+        if not self.winfo_ismapped():
+            return
+        if self.job is not None:
+            self.highlight_view()
+        self.after(self.VIEW_POLL_INTERVAL, self.poll_view)
+
+    def highlight_view(self):
+        first, last = self.visible_lines()
+        view = (first, last, self.index.first_line)
+        if view == self.view:
+            return
+        self.view = view
+        self.clear_highlights()
+        for line, column, end_line, end_column in self.job.matches_between(first, last):
+            self.widget.tag_add("search_match", self.widget_index(line, column), self.widget_index(end_line, end_column))
+        if self.current is not None and first <= self.current[0] <= last:
+            line, column, end_line, end_column = self.current
+            self.widget.tag_add("search_current", self.widget_index(line, column), self.widget_index(end_line, end_column))
+
+    def clear_highlights(self):
+        self.view = None
+        self.widget.tag_remove("search_match", "1.0", tk.END)
+        self.widget.tag_remove("search_current", "1.0", tk.END)
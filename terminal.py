@@ -1,14 +1,36 @@
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox, simpledialog
+from tkinter import ttk, filedialog, messagebox, simpledialog, font
 from ttkthemes import ThemedTk
 import os
+import queue
 import subprocess
+import threading
+import tempfile
+import time
 from file_explorer import FileExplorer
 from text_editor import MultiCursorText
 from file_viewer import FileViewer
+from transfer_panel import TransferPanel
+from find_bar import FindBar
 from utils.theme_manager import ThemeManager
 from utils.font_manager import FontManager
 from utils.command_processor import CommandProcessor, SSHClient
+from utils.shell_session import ShellSession, RemoteShellSession
+from utils.scrollback import Scrollback
+from utils.search_index import SearchIndex
+from utils.output_buffer import OutputBuffer
+from utils.dir_cache import DirectoryCache, RemoteDirectoryCache
+from utils.file_source import RemoteFileSource
+from utils.render_cache import RenderCache
+from utils.session_manager import SessionManager
+from utils.transfer import TransferEngine
+from utils.connection_profiles import ConnectionProfiles
+from utils.config import config_path
+
+OUTPUT_POLL_INTERVAL = 16  # ms
+OUTPUT_CHUNK_BUDGET = 65536  # characters rendered per poll
+SCROLLBACK_LINES = 10000
+SCROLLBACK_CHARS = 4 * 1024 * 1024
 
 class Terminal(ThemedTk):
     def __init__(self):
@@ -17,15 +39,32 @@ class Terminal(ThemedTk):
         self.geometry("1000x700")
 
         self.current_directory = os.getcwd()
+        self.local_directory = self.current_directory
         self.ssh_client = None
+        self.remote_session = None
+        self.connection_profiles = ConnectionProfiles(config_path("connections.json"))
+        self.connection_profile = None  # profile of the current SSH connection
+        self.connecting = None  # (client, profile, results, progress window) while a connect runs
+        self.connect_timeout = SSHClient.CONNECT_TIMEOUT
+        self.keepalive_interval = SSHClient.KEEPALIVE_INTERVAL
+        self.transfer_engine = None
+        self.transfer_panel = None
+        self.session_manager = SessionManager()
+        self.broadcast_hosts = 0
+        self.dir_cache = DirectoryCache()
+        self.remote_dir_cache = RemoteDirectoryCache()
+        self.render_cache = RenderCache()
 
         self.create_widgets()
 
         self.theme_manager = ThemeManager(self)
         self.font_manager = FontManager(self)
-        self.command_processor = CommandProcessor()
+        self.command_processor = CommandProcessor(self.dir_cache)
+        self.start_shell()
 
         self.create_menu()
+        self.protocol("WM_DELETE_WINDOW", self.close_window)
+        self.after(OUTPUT_POLL_INTERVAL, self.poll_output)
 
     def create_widgets(self):
         self.paned_window = ttk.PanedWindow(self, orient=tk.HORIZONTAL)
@@ -45,9 +84,42 @@ class Terminal(ThemedTk):
         self.terminal.bind("<Up>", self.show_previous_command)
         self.terminal.bind("<Down>", self.show_next_command)
         self.terminal.bind("<Tab>", self.auto_complete)
-        self.terminal.insert(tk.END, f"{self.current_directory}> ")
+        self.terminal.bind("<Control-c>", self.interrupt_command)
+        self.terminal.bind("<Control-r>", self.search_history)
+        self.terminal.bind("<Configure>", self.on_terminal_resize)
+        self.terminal.bind("<Control-F>", self.show_find_bar)
+        # Everything typed after this mark is the pending input line
+        self.terminal.mark_set("input_start", "1.0")
+        self.terminal.mark_gravity("input_start", tk.LEFT)
+        self.scrollback = Scrollback(self.terminal, max_lines=SCROLLBACK_LINES, max_chars=SCROLLBACK_CHARS, end="input_start")
+        self.search_index = SearchIndex()
+        self.find_bar = FindBar(frame, self.terminal, self.search_index, self.scrollback)
+        self.output_buffer = OutputBuffer(self.terminal, on_flush=self.on_output_rendered, input_mark="input_start")
         return frame
 
+    def start_shell(self):
+        self.shell_session = ShellSession()
+        self.shell_session.start(self.local_directory)
+        self.shell_session.resize(*self.terminal_size())
+
+    def terminal_size(self):
+        # Columns and rows that fit the widget, for the shells' window size
+        text_font = font.Font(font=self.terminal.cget("font"))
+        width = max(self.terminal.winfo_width(), 1)
+        height = max(self.terminal.winfo_height(), 1)
+        columns = max(20, width // max(text_font.measure("0"), 1))
+        rows = max(5, height // max(text_font.metrics("linespace"), 1))
+        return columns, rows
+
+    def on_terminal_resize(self, event):
+        size = self.terminal_size()
+        for session in (self.shell_session, self.remote_session):
+            if session is not None:
+                try:
+                    session.resize(*size)
+                except Exception:
+                    pass
+
     def create_menu(self):
         menubar = tk.Menu(self)
         self.config(menu=menubar)
@@ -55,72 +127,331 @@ class Terminal(ThemedTk):
         file_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="File", menu=file_menu)
         file_menu.add_command(label="Open File", command=self.open_file)
-        file_menu.add_command(label="Exit", command=self.quit)
+        file_menu.add_command(label="Exit", command=self.close_window)
 
         view_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="View", menu=view_menu)
         view_menu.add_command(label="Change Theme", command=self.theme_manager.change_theme)
         view_menu.add_command(label="Change Font", command=self.font_manager.change_font)
+        self.spill_scrollback = tk.BooleanVar(self, value=False)
+        view_menu.add_checkbutton(label="Keep Trimmed Scrollback on Disk", variable=self.spill_scrollback, command=self.toggle_scrollback_spill)
+        self.persist_renders = tk.BooleanVar(self, value=False)
+        view_menu.add_checkbutton(label="Keep Rendered Files on Disk", variable=self.persist_renders, command=self.toggle_render_persistence)
+        view_menu.add_command(label="Viewer Cache Status", command=self.show_render_cache_status)
 
         ssh_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="SSH", menu=ssh_menu)
         ssh_menu.add_command(label="Connect", command=self.connect_ssh)
+        self.saved_connections_menu = tk.Menu(ssh_menu, tearoff=0, postcommand=self.update_saved_connections_menu)
+        ssh_menu.add_cascade(label="Saved Connections", menu=self.saved_connections_menu)
+        ssh_menu.add_command(label="Connection Timeouts", command=self.set_connection_timeouts)
         ssh_menu.add_command(label="Disconnect", command=self.disconnect_ssh)
+        ssh_menu.add_command(label="Connection Status", command=self.show_ssh_status)
+        ssh_menu.add_command(label="Transfers", command=self.show_transfers)
+        ssh_menu.add_separator()
+        ssh_menu.add_command(label="Add Broadcast Hosts", command=self.add_broadcast_hosts)
+        ssh_menu.add_command(label="Broadcast Command", command=self.broadcast_command)
+        ssh_menu.add_command(label="Disconnect Broadcast Hosts", command=self.disconnect_broadcast_hosts)
         
 
     def show_previous_command(self, event):
-        prev_command = self.command_processor.get_previous_command()
-        if prev_command:
-            self.terminal.delete("insert linestart", "insert lineend")
-            self.terminal.insert("insert linestart", f"{self.current_directory}> {prev_command}")
+        prev_command = self.command_processor.get_previous_command(self.get_input())
+        if prev_command is not None:
+            self.replace_input(prev_command)
         return "break"
 
     def show_next_command(self, event):
-        next_command = self.command_processor.get_next_command()
-        if next_command:
-            self.terminal.delete("insert linestart", "insert lineend")
-            self.terminal.insert("insert linestart", f"{self.current_directory}> {next_command}")
+        next_command = self.command_processor.get_next_command(self.get_input())
+        if next_command is not None:
+            self.replace_input(next_command)
         return "break"
 
+    def search_history(self, event):
+        match = self.command_processor.search_history(self.get_input())
+        if match is not None:
+            self.replace_input(match)
+        else:
+            self.bell()
+        return "break"
+
+    def get_input(self):
+        return self.terminal.get("input_start", "end-1c")
+
+    def replace_input(self, text):
+        self.terminal.delete("input_start", "end-1c")
+        self.terminal.insert(tk.END, text)
+        self.terminal.mark_set(tk.INSERT, "end-1c")
+        self.terminal.see(tk.END)
+
     def auto_complete(self, event):
         current_text = self.terminal.get("insert linestart", "insert")
         command = current_text.split("> ")[-1].strip()
         
-        if command:
+        if command and self.current_directory:
             possible_completions = self.command_processor.get_possible_completions(command, self.current_directory)
             if len(possible_completions) == 1:
                 completion = possible_completions[0][len(command):]
                 self.terminal.insert(tk.INSERT, completion)
             elif len(possible_completions) > 1:
-                self.terminal.insert(tk.END, "\n" + " ".join(possible_completions))
-                self.terminal.insert(tk.END, f"\n{self.current_directory}> {command}")
+                self.write_output("\n" + " ".join(possible_completions) + f"\n{self.current_directory}> ")
+                self.output_buffer.flush()
         
         return "break"
 
 
 
     def connect_ssh(self):
-        hostname = simpledialog.askstring("SSH Connection", "Enter hostname:")
+        hostname = simpledialog.askstring("SSH Connection", "Enter hostname (host or host:port):")
+        if not hostname:
+            return
         username = simpledialog.askstring("SSH Connection", "Enter username:")
-        password = simpledialog.askstring("SSH Connection", "Enter password:", show='*')
-        
-        self.ssh_client = SSHClient()
-        if self.ssh_client.connect(hostname, username, password):
-            self.terminal.insert(tk.END, f"\nConnected to {hostname}\n")
-            self.current_directory = self.ssh_client.execute_command("pwd").strip()
-            self.file_explorer.populate_tree()
-        else:
-            self.terminal.insert(tk.END, "\nFailed to connect\n")
-            self.ssh_client = None
+        if not username:
+            return
+        password = simpledialog.askstring("SSH Connection", "Enter password (blank to use SSH agent or keys):", show='*')
+        hostname, _, port = hostname.partition(":")
+        profile = self.connection_profiles.new_profile(
+            hostname, username, port=int(port) if port.isdigit() else 22, password_auth=bool(password),
+            timeout=self.connect_timeout, keepalive=self.keepalive_interval,
+        )
+        self.start_connect(profile, password or None)
+
+    def connect_profile(self, name):
+        profile = self.connection_profiles.find(name)
+        if profile is None:
+            return
+        password = None
+        if profile["password_auth"]:
+            password = simpledialog.askstring("SSH Connection", f"Password for {name}:", show='*')
+            if password is None:
+                return
+        self.start_connect(profile, password)
+
+    def update_saved_connections_menu(self):
+        self.saved_connections_menu.delete(0, tk.END)
+        names = self.connection_profiles.names()
+        for name in names:
+            self.saved_connections_menu.add_command(label=name, command=lambda name=name: self.connect_profile(name))
+        if not names:
+            self.saved_connections_menu.add_command(label="(none)", state=tk.DISABLED)
+            return
+        self.saved_connections_menu.add_separator()
+        self.saved_connections_menu.add_command(label="Forget a Saved Connection", command=self.forget_connection)
+
+    def forget_connection(self):
+        name = simpledialog.askstring("Saved Connections", "Connection to forget:\n" + "\n".join(self.connection_profiles.names()))
+        if name:
+            self.connection_profiles.remove(name.strip())
+
+    def set_connection_timeouts(self):
+        timeout = simpledialog.askinteger("Connection Timeouts", "Connect timeout (seconds):",
+                                          initialvalue=self.connect_timeout, minvalue=1)
+        if timeout is None:
+            return
+        keepalive = simpledialog.askinteger("Connection Timeouts", "Keepalive interval (seconds, 0 to disable):",
+                                            initialvalue=self.keepalive_interval, minvalue=0)
+        if keepalive is None:
+            return
+        self.connect_timeout, self.keepalive_interval = timeout, keepalive
+        if self.is_ssh_connected():
+            self.connection_profile.update(timeout=timeout, keepalive=keepalive)
+            self.connection_profiles.save(self.connection_profile)
+            self.ssh_client.client.get_transport().set_keepalive(keepalive)
+
+    def start_connect(self, profile, password):
+        # DNS, key exchange and authentication run on a worker thread, and so does opening the
+        # remote shell; poll_connect picks up the result while the window stays responsive
+        if self.connecting is not None:
+            return
+        if self.is_ssh_connected():
+            self.disconnect_ssh()
+        client = SSHClient()
+        session = RemoteShellSession(client)
+        results = queue.Queue()
+        size = self.terminal_size()
+
+        def connect():
+            connected = client.connect(
+                profile["hostname"], profile["username"], password, port=profile["port"],
+                key_filename=profile["key_filename"], timeout=profile["timeout"], keepalive=profile["keepalive"],
+            )
+            if connected:
+                try:
+                    session.start(profile["directory"], *size)
+                except Exception as e:
+                    client.last_error = e
+                    client.close()
+                    connected = False
+            results.put((connected, session))
+
+        self.connecting = (client, profile, results, self.show_connect_progress(profile))
+        threading.Thread(target=connect, daemon=True).start()
+        self.after(OUTPUT_POLL_INTERVAL, self.poll_connect)
+
+    def show_connect_progress(self, profile):
+        window = tk.Toplevel(self)
+        window.title("SSH Connection")
+        window.transient(self)
+        window.resizable(False, False)
+        ttk.Label(window, text=f"Connecting to {ConnectionProfiles.name(profile)}\u2026").pack(padx=20, pady=(15, 5))
+        progress = ttk.Progressbar(window, mode="indeterminate", length=240)
+        progress.pack(padx=20, pady=5)
+        progress.start(15)
+        ttk.Button(window, text="Cancel", command=self.cancel_connect).pack(pady=(5, 15))
+        window.protocol("WM_DELETE_WINDOW", self.cancel_connect)
+        return window
+
+    def cancel_connect(self):
+        if self.connecting is None:
+            return
+        client, profile, results, window = self.connecting
+        self.connecting = None
+        window.destroy()
+        self.write_output(f"\nConnection to {ConnectionProfiles.name(profile)} cancelled\n")
+        # Closing the transport aborts a handshake in progress; the worker cleans up after itself
+        threading.Thread(target=client.cancel, daemon=True).start()
+        threading.Thread(target=self.discard_connection, args=(client, results), daemon=True).start()
+
+    def discard_connection(self, client, results):
+        connected, session = results.get()
+        if connected:
+            session.close()
+            client.close()
+
+    def poll_connect(self):
+        if self.connecting is None:
+            return
+        client, profile, results, window = self.connecting
+        try:
+            connected, session = results.get_nowait()
+        except queue.Empty:
+            self.after(OUTPUT_POLL_INTERVAL, self.poll_connect)
+            return
+        self.connecting = None
+        window.destroy()
+        name = ConnectionProfiles.name(profile)
+        if not connected:
+            self.write_output(f"\nFailed to connect to {name}: {str(client.last_error)}\n")
+            if client.auth_failed and not profile["password_auth"]:
+                # Agent and keys were refused; fall back to a password for this profile
+                password = simpledialog.askstring("SSH Connection", f"Password for {name}:", show='*')
+                if password:
+                    profile["password_auth"] = True
+                    self.start_connect(profile, password)
+            return
+        self.ssh_client = client
+        self.remote_session = session
+        self.connection_profile = profile
+        self.connection_profiles.save(profile)
+        self.write_output(f"\nConnected to {name}\n")
+        self.remote_dir_cache.invalidate()
+        # Without a remembered directory the explorer waits for the remote shell's first prompt
+        self.current_directory = profile["directory"]
+        self.file_explorer.populate_tree()
+
+    def show_ssh_status(self):
+        if not self.is_ssh_connected():
+            messagebox.showinfo("Connection Status", "Not connected")
+            return
+        try:
+            self.ssh_client.measure_latency()
+        except Exception:
+            pass
+        self.show_stats("Connection Status", self.ssh_client.stats())
+
+    def show_stats(self, title, stats):
+        lines = [f"{name.replace('_', ' ').capitalize()}: {value if not isinstance(value, float) else f'{value:.1f}'}"
+                 for name, value in stats.items()]
+        messagebox.showinfo(title, "\n".join(lines))
 
     def disconnect_ssh(self):
         if self.ssh_client:
+            if self.remote_session is not None:
+                self.remote_session.close()
+                self.remote_session = None
+            if self.transfer_engine is not None:
+                self.transfer_engine.close()
+                self.transfer_engine = None
+            if self.transfer_panel is not None:
+                self.transfer_panel.window.destroy()
+                self.transfer_panel = None
             self.ssh_client.close()
             self.ssh_client = None
-            self.current_directory = os.getcwd()
-            self.terminal.insert(tk.END, "\nDisconnected from SSH\n")
+            if self.current_directory:
+                self.connection_profile["directory"] = self.current_directory
+                self.connection_profiles.save(self.connection_profile)
+            self.connection_profile = None
+            self.remote_dir_cache.invalidate()
+            self.current_directory = self.local_directory
+            self.write_output("\nDisconnected from SSH\n")
             self.file_explorer.populate_tree()
+            self.shell_session.send_command("")
     
+    def start_transfer(self, direction, paths, destination):
+        if not self.is_ssh_connected():
+            messagebox.showinfo("Transfers", "Not connected")
+            return
+        if self.transfer_engine is None:
+            self.transfer_engine = TransferEngine(self.ssh_client)
+        for path in paths:
+            if direction == "download":
+                self.transfer_engine.download(path, destination)
+            else:
+                self.transfer_engine.upload(path, destination)
+        self.show_transfers()
+
+    def show_transfers(self):
+        if self.transfer_engine is None:
+            messagebox.showinfo("Transfers", "No transfers")
+            return
+        if self.transfer_panel is None:
+            self.transfer_panel = TransferPanel(self, self.transfer_engine)
+        self.transfer_panel.show()
+
+    def add_broadcast_hosts(self):
+        hosts = simpledialog.askstring("Broadcast Hosts", "Enter hostnames (comma or space separated):")
+        if not hosts:
+            return
+        username = simpledialog.askstring("Broadcast Hosts", "Enter username:")
+        password = simpledialog.askstring("Broadcast Hosts", "Enter password (blank to use SSH agent or keys):", show='*')
+        hosts = [host for host in hosts.replace(",", " ").split() if host]
+        self.write_output(f"\nConnecting to {len(hosts)} hosts in the background\n")
+        # A blank password means agent or key authentication, as in connect_ssh
+        self.session_manager.connect(hosts, username, password or None)
+
+    def broadcast_command(self):
+        hosts = self.session_manager.hosts()
+        if not hosts:
+            messagebox.showinfo("Broadcast Command", "No broadcast hosts are connected")
+            return
+        if self.session_manager.is_running():
+            messagebox.showinfo("Broadcast Command", "A broadcast is still running")
+            return
+        command = simpledialog.askstring("Broadcast Command", f"Command to run on {len(hosts)} hosts:")
+        if command:
+            self.command_processor.add_to_history(command)
+            self.write_output(f"\n[broadcast] {command}\n")
+            self.broadcast_hosts = self.session_manager.broadcast(command)
+
+    def disconnect_broadcast_hosts(self):
+        count = len(self.session_manager.hosts())
+        self.session_manager.disconnect()
+        self.write_output(f"\nDisconnected {count} broadcast hosts\n")
+
+    def poll_broadcast(self):
+        # Checked before draining: workers queue their last line before they stop running,
+        # so an empty read after they stopped means nothing is left to show
+        running = self.session_manager.is_running()
+        lines = self.session_manager.read_output()
+        if lines:
+            self.write_output("".join(f"[{host}] {line}\n" for host, line in lines))
+        if self.broadcast_hosts and not running and not lines:
+            elapsed = time.perf_counter() - self.session_manager.started
+            self.write_output(
+                f"[broadcast] finished on {self.broadcast_hosts} hosts in {elapsed:.2f}s, "
+                f"{self.session_manager.failures} failed\n"
+            )
+            self.broadcast_hosts = 0
+
     def open_file(self, path):
         if self.is_ssh_connected():
             self.open_remote_file(path)
@@ -129,70 +460,137 @@ class Terminal(ThemedTk):
 
     def open_local_file(self, path):
         if os.path.isfile(path):
-            FileViewer(self, path)
+            FileViewer(self, path, render_cache=self.render_cache, style=self.theme_manager.syntax_style())
         else:
             messagebox.showerror("Error", f"Cannot open {path}: Not a file")
 
     def open_remote_file(self, path):
         try:
-            sftp = self.ssh_client.open_sftp()
-            with sftp.open(path, 'r') as remote_file:
-                content = remote_file.read().decode('utf-8')
-            sftp.close()
-            
-            # Create a temporary file to display the content
-            temp_path = os.path.join(os.getcwd(), "temp_remote_file.txt")
-            with open(temp_path, 'w', encoding='utf-8') as temp_file:
-                temp_file.write(content)
-            
-            FileViewer(self, temp_path)
-            
-            # Clean up the temporary file after viewing
-            os.remove(temp_path)
+            source = RemoteFileSource(self.ssh_client.get_sftp(), path)
+            FileViewer(self, path, source=source, style=self.theme_manager.syntax_style())
         except Exception as e:
             messagebox.showerror("Error", f"Failed to open remote file: {str(e)}")
 
+    def follow_file(self, path):
+        try:
+            if self.is_ssh_connected():
+                FileViewer(self, path, follow=True, sftp=self.ssh_client.open_sftp())
+            elif os.path.isfile(path):
+                FileViewer(self, path, follow=True)
+            else:
+                messagebox.showerror("Error", f"Cannot follow {path}: Not a file")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to follow file: {str(e)}")
+
     def is_ssh_connected(self):
         return self.ssh_client is not None
 
     def process_command(self, event):
-        command = self.terminal.get("insert linestart", "insert lineend")
-        command = command.split("> ")[-1].strip()
+        self.output_buffer.flush()
+        command = self.get_input().strip()
         self.terminal.insert(tk.END, "\n")
+        # The entered line joins the output; whatever is typed next is the new input
+        self.terminal.mark_set("input_start", "end-1c")
+        self.index_output()
 
-        if command.lower() == "exit":
-            self.quit()
-        elif command.lower().startswith("cd "):
-            self.change_directory(command[3:].strip())
+        if self.is_ssh_connected():
+            self.process_remote_command(command)
         else:
-            output = self.execute_command(command)
-            self.terminal.insert(tk.END, output)
-
-        self.terminal.insert(tk.END, f"\n{self.current_directory}> ")
-        self.terminal.see(tk.END)
+            self.process_local_command(command)
         return "break"
 
-    def change_directory(self, new_dir):
-        if self.is_ssh_connected():
-            try:
-                self.ssh_client.exec_command(f"cd {new_dir}")
-                _, stdout, _ = self.ssh_client.exec_command("pwd")
-                self.current_directory = stdout.read().decode().strip()
-            except Exception as e:
-                self.terminal.insert(tk.END, f"Error changing directory: {str(e)}\n")
+    def process_local_command(self, command):
+        self.send_to_session(self.shell_session, command)
+
+    def process_remote_command(self, command):
+        self.send_to_session(self.remote_session, command)
+
+    def send_to_session(self, session, command):
+        # While a program is running the line is its input, not a new command
+        if not session.busy:
+            if command.lower() == "exit":
+                self.close_window()
+                return
+            if command:
+                self.command_processor.add_to_history(command)
+        session.send_command(command)
+
+    def write_output(self, text):
+        self.output_buffer.write(text)
+
+    def on_output_rendered(self, text):
+        self.index_output()
+
+    def index_output(self):
+        # Scrollback returns what reached the widget before the input line, entered lines
+        # included, so index lines stay in step with widget lines
+        counted = self.scrollback.append()
+        first_block = self.search_index.append(counted)
+        self.search_index.trim(self.scrollback.trimmed_lines)
+        self.find_bar.on_output(first_block)
+
+    def show_find_bar(self, event=None):
+        return self.find_bar.show()
+
+    def close_window(self):
+        # The spilled scrollback lives in the temp directory; do not leave it behind
+        self.scrollback.close()
+        self.destroy()
+
+    def toggle_scrollback_spill(self):
+        if self.spill_scrollback.get():
+            self.scrollback.spill_path = os.path.join(tempfile.gettempdir(), f"systermin-scrollback-{os.getpid()}.gz")
         else:
-            try:
-                os.chdir(new_dir)
-                self.current_directory = os.getcwd()
-            except FileNotFoundError:
-                self.terminal.insert(tk.END, f"Directory not found: {new_dir}\n")
-        self.file_explorer.populate_tree()
+            self.scrollback.clear_spill()
+            self.scrollback.spill_path = None
 
-    def execute_command(self, command):
-        if self.is_ssh_connected():
-            _, stdout, stderr = self.ssh_client.exec_command(command)
-            output = stdout.read().decode()
-            error = stderr.read().decode()
-            return output if output else error
+    def toggle_render_persistence(self):
+        if self.persist_renders.get():
+            self.render_cache.directory = config_path("render_cache")
         else:
-            return self.command_processor.execute(command)
\ No newline at end of file
+            self.render_cache.clear_disk()
+            self.render_cache.directory = None
+
+    def show_render_cache_status(self):
+        self.show_stats("Viewer Cache Status", self.render_cache.stats())
+
+    def interrupt_command(self, event):
+        session = self.remote_session if self.is_ssh_connected() else self.shell_session
+        if session is not None and session.busy:
+            session.interrupt()
+            return "break"
+
+    def update_remote_directory(self, path):
+        self.ssh_client.current_directory = path
+        if path != self.current_directory:
+            self.current_directory = path
+            self.file_explorer.populate_tree()
+
+    def update_local_directory(self, path):
+        self.local_directory = path
+        if not self.is_ssh_connected() and path != self.current_directory:
+            self.current_directory = path
+            self.file_explorer.populate_tree()
+
+    def poll_output(self):
+        self.poll_broadcast()
+        if self.remote_session is not None:
+            output, cwd, closed = self.remote_session.read_output(OUTPUT_CHUNK_BUDGET)
+            if output:
+                self.write_output(output)
+            if cwd:
+                self.update_remote_directory(cwd)
+            if closed:
+                self.write_output("\n[remote shell closed]\n")
+                self.disconnect_ssh()
+
+        output, cwd, exited = self.shell_session.read_output(OUTPUT_CHUNK_BUDGET)
+        if output:
+            self.write_output(output)
+        if cwd:
+            self.update_local_directory(cwd)
+        if exited:
+            self.write_output("\n[shell exited, starting a new session]\n")
+            self.start_shell()
+
+        self.after(OUTPUT_POLL_INTERVAL, self.poll_output)
@@ -3,29 +3,66 @@ import tkinter as tk
 class MultiCursorText(tk.Text):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.cursors = [(1.0, 1.0)]  # List of (start, end) for each cursor
+        self.cursors = []  # Mark names of the extra cursors; tk.INSERT is always the primary cursor
+        self.cursor_counter = 0
         self.bind("<Control-B>", self.add_cursor)
+        self.bind("<Escape>", self.clear_cursors, add=True)
+        self.bind("<KeyPress>", self.on_key_press, add=True)
+        self.bind("<BackSpace>", self.on_backspace, add=True)
+        self.bind("<Delete>", self.on_delete, add=True)
 
-    def add_cursor(self, event):
+    def add_cursor(self, event=None):
         current_pos = self.index(tk.INSERT)
-        self.cursors.append((current_pos, current_pos))
-        self.mark_set(f"cursor_{len(self.cursors)}", current_pos)
+        for mark in self.cursors:
+            if self.compare(mark, "==", current_pos):
+                return "break"
+        self.cursor_counter += 1
+        mark = f"cursor_{self.cursor_counter}"
+        self.mark_set(mark, current_pos)
+        self.mark_gravity(mark, tk.RIGHT)
+        self.cursors.append(mark)
         self.see(current_pos)
         return "break"
 
-    def insert(self, index, chars, *args):
-        for i, (start, end) in enumerate(self.cursors):
-            super().insert(start, chars, *args)
-            new_end = self.index(f"{start}+{len(chars)}c")
-            self.cursors[i] = (new_end, new_end)
-            if i > 0:
-                self.mark_set(f"cursor_{i+1}", new_end)
-        self.see(self.cursors[-1][1])
-
-    def delete(self, index1, index2=None):
-        for i, (start, end) in enumerate(self.cursors):
-            super().delete(start, end)
-            self.cursors[i] = (start, start)
-            if i > 0:
-                self.mark_set(f"cursor_{i+1}", start)
-        self.see(self.cursors[-1][1])
\ No newline at end of file
+    def clear_cursors(self, event=None):
+        for mark in self.cursors:
+            self.mark_unset(mark)
+        self.cursors = []
+
+    def on_key_press(self, event):
+        # Typing goes through Tk's class bindings, which never reach insert(); replicate it here
+        if self.cursors and event.char and event.char.isprintable() and not event.state & 0x4:
+            self.insert_at_cursors(event.char)
+            return "break"
+
+    def on_backspace(self, event):
+        if self.cursors:
+            self.delete_at_cursors(1, 0)
+            return "break"
+
+    def on_delete(self, event):
+        if self.cursors:
+            self.delete_at_cursors(0, 1)
+            return "break"
+
+    # insert() and delete() are plain tk.Text calls that honour their index; only the key
+    # handlers above edit at every cursor
+
+    def insert_at_cursors(self, chars):
+        for mark in self.sorted_cursors():
+            super().insert(mark, chars)
+        self.see(tk.INSERT)
+
+    def delete_at_cursors(self, before, after):
+        # Deletes `before` characters before and `after` characters after each cursor
+        for mark in self.sorted_cursors():
+            super().delete(f"{mark}-{before}c", f"{mark}+{after}c")
+        self.see(tk.INSERT)
+
+    def sorted_cursors(self):
+        # Apply edits back to front so earlier positions are never shifted mid-batch
+        positions = {}
+        for mark in [tk.INSERT] + self.cursors:
+            position = tuple(map(int, self.index(mark).split(".")))
+            positions.setdefault(position, mark)
+        return [positions[position] for position in sorted(positions, reverse=True)]
@@ -0,0 +1,88 @@
+import tkinter as tk
+from tkinter import ttk
+
+class TransferPanel:
+    # Lists the transfer engine's tasks with their progress and the overall throughput.
+    # Rows are only touched when their task has changed since the last refresh.
+    REFRESH_INTERVAL = 250  # ms
+
+    def __init__(self, parent, engine):
+        self.engine = engine
+        self.window = tk.Toplevel(parent)
+        self.window.title("Transfers")
+        self.window.geometry("700x300")
+        self.window.protocol("WM_DELETE_WINDOW", self.hide)
+        self.rows = {}  # task -> (item, last shown state)
+        self.create_widgets()
+        self.refresh()
+
+    def create_widgets(self):
+        toolbar = ttk.Frame(self.window)
+        toolbar.pack(side=tk.TOP, fill=tk.X)
+        self.summary = ttk.Label(toolbar, anchor=tk.W)
+        self.summary.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        ttk.Button(toolbar, text="Clear Finished", command=self.clear_finished).pack(side=tk.RIGHT)
+        ttk.Button(toolbar, text="Cancel All", command=self.engine.cancel).pack(side=tk.RIGHT)
+
+        self.tree = ttk.Treeview(self.window, columns=("direction", "progress", "status"), show="tree headings")
+        scrollbar = ttk.Scrollbar(self.window, orient=tk.VERTICAL, command=self.tree.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.heading("#0", text="File", anchor=tk.W)
+        self.tree.heading("direction", text="Direction", anchor=tk.W)
+        self.tree.heading("progress", text="Progress", anchor=tk.W)
+        self.tree.heading("status", text="Status", anchor=tk.W)
+        self.tree.column("direction", width=80, stretch=False)
+        self.tree.column("progress", width=160, stretch=False)
+
+    def refresh(self):
+        if not self.window.winfo_exists():
+            return
+        tasks = self.engine.snapshot()
+        done = 0
+        for task in tasks:
+            if task.status == "done":
+                done += 1
+            state = (task.transferred, task.status)
+            row = self.rows.get(task)
+            if row is not None and row[1] == state:
+                continue
+            percent = task.transferred * 100 // task.size if task.size else 100 if task.status == "done" else 0
+            values = (
+                task.direction,
+                f"{percent}% of {format_size(task.size)}",
+                task.status if not task.error or task.status != "failed" else f"failed: {task.error}",
+            )
+            if row is None:
+                item = self.tree.insert("", tk.END, text=task.name, values=values)
+            else:
+                item = row[0]
+                self.tree.item(item, values=values)
+            self.rows[task] = (item, state)
+        self.summary.configure(
+            text=f"{done:,} of {len(tasks):,} files done - {format_size(self.engine.throughput())}/s"
+        )
+        self.window.after(self.REFRESH_INTERVAL, self.refresh)
+
+    def clear_finished(self):
+        self.engine.clear_finished()
+        remaining = set(self.engine.snapshot())
+        for task in list(self.rows):
+            if task not in remaining:
+                self.tree.delete(self.rows.pop(task)[0])
+
+    def show(self):
+        self.window.deiconify()
+        self.window.lift()
+
+    def hide(self):
+        # Transfers keep running with the panel closed
+        self.window.withdraw()
+
+def format_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
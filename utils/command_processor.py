@@ -1,43 +1,93 @@
-import subprocess
 import os
+import collections
+import queue
+import shlex
+import threading
+import time
 import paramiko
+from utils.config import config_path
+from utils.history import CommandHistory
+from utils.executable_index import ExecutableIndex
+from utils.option_completion import OptionCompletionProvider
+from utils.dir_cache import DirectoryCache
 
-class CommandProcessor:
-    def __init__(self):
-        self.command_history = []
-        self.history_index = -1
+BUILTIN_COMMANDS = ["cd", "exit"]
 
-    def execute(self, command, ssh_client=None):
-        self.command_history.append(command)
-        self.history_index = len(self.command_history)
+class KnownHostsPolicy(paramiko.MissingHostKeyPolicy):
+    # Accepts a new host key like AutoAddPolicy, but saves it safely when many clients
+    # connect at once: under a process-wide lock, the file is re-read, merged with the new
+    # key and replaced through a temporary file, so concurrent additions are not lost.
+    lock = threading.Lock()
 
-        if ssh_client:
-            return ssh_client.execute_command(command)
-        else:
+    def __init__(self, path):
+        self.path = path
+
+    def missing_host_key(self, client, hostname, key):
+        client.get_host_keys().add(hostname, key.get_name(), key)
+        with self.lock:
+            keys = paramiko.HostKeys()
             try:
-                output = subprocess.check_output(f"powershell.exe -Command {command}", shell=True, text=True, stderr=subprocess.STDOUT)
-                return output
-            except subprocess.CalledProcessError as e:
-                return f"Error: {e.output}"
-
-    def get_previous_command(self):
-        if self.history_index > 0:
-            self.history_index -= 1
-            return self.command_history[self.history_index]
-        return None
-
-    def get_next_command(self):
-        if self.history_index < len(self.command_history) - 1:
-            self.history_index += 1
-            return self.command_history[self.history_index]
-        return None
+                keys.load(self.path)
+            except IOError:
+                pass
+            keys.add(hostname, key.get_name(), key)
+            temporary_path = self.path + ".tmp"
+            try:
+                keys.save(temporary_path)
+                os.replace(temporary_path, self.path)
+            except IOError:
+                pass
+
+class CommandProcessor:
+    def __init__(self, dir_cache=None):
+        self.dir_cache = dir_cache or DirectoryCache()
+        self.command_history = CommandHistory(config_path("history"))
+        self.history_navigation = None
+        self.history_search = None
+        self.executable_index = ExecutableIndex(config_path("executables.json"))
+        self.option_completion = OptionCompletionProvider(config_path("options.json"))
+
+    def add_to_history(self, command):
+        self.command_history.add(command)
+        self.history_navigation = None
+        self.history_search = None
+
+    def get_previous_command(self, current_input=""):
+        # Up-arrow walks the commands starting with whatever was typed before navigating
+        if self.history_navigation is None or current_input != self.history_navigation.current:
+            self.history_navigation = self.command_history.navigate(current_input)
+        return self.history_navigation.previous()
+
+    def get_next_command(self, current_input=""):
+        if self.history_navigation is None or current_input != self.history_navigation.current:
+            return None
+        return self.history_navigation.next()
+
+    def search_history(self, current_input):
+        # Ctrl+R: the typed text is a fuzzy query, repeated presses cycle through older matches
+        search = self.history_search
+        if search is None or current_input != search["current"]:
+            search = {"matches": self.command_history.fuzzy_search(current_input), "position": -1}
+            self.history_search = search
+        if search["position"] + 1 >= len(search["matches"]):
+            return None
+        search["position"] += 1
+        search["current"] = search["matches"][search["position"]]
+        return search["current"]
 
     def get_possible_completions(self, command, current_directory):
+        if current_directory is None:
+            return []  # The remote shell has not reported its directory yet
         parts = command.split()
         if len(parts) == 1:
             # Complete command names
-            all_commands = self.get_all_commands() + os.listdir(current_directory)
-            return [cmd for cmd in all_commands if cmd.startswith(parts[0])]
+            try:
+                local_entries = [name for name, _ in self.dir_cache.list(current_directory)]
+            except OSError:
+                local_entries = []
+            matches = set(self.executable_index.complete(parts[0]))
+            matches.update(cmd for cmd in BUILTIN_COMMANDS + local_entries if cmd.startswith(parts[0]))
+            return sorted(matches)
         else:
             # Complete file paths and command options
             if parts[0] in ['cd', 'dir', 'type']:
@@ -45,70 +95,213 @@ class CommandProcessor:
             else:
                 return self.complete_command_options(parts[0], parts[-1])
     
-    def get_all_commands(self):
-        try:
-            output = subprocess.check_output("powershell.exe Get-Command", shell=True, text=True)
-            return [line.split()[0] for line in output.splitlines()[3:]]
-        except subprocess.CalledProcessError:
-            return []
-
     def complete_file_path(self, partial_path, current_directory):
         full_path = os.path.join(current_directory, partial_path)
         dir_name = os.path.dirname(full_path)
         file_name = os.path.basename(full_path)
         try:
-            return [os.path.join(dir_name, f) for f in os.listdir(dir_name) if f.startswith(file_name)]
+            return [os.path.join(dir_name, f) for f, _ in self.dir_cache.list(dir_name) if f.startswith(file_name)]
         except OSError:
             return []
 
     def complete_command_options(self, command, partial_option):
-        try:
-            output = subprocess.check_output(f"powershell.exe Get-Help {command}", shell=True, text=True)
-            options = [line.split()[0] for line in output.splitlines() if line.strip().startswith('-')]
-            return [opt for opt in options if opt.startswith(partial_option)]
-        except subprocess.CalledProcessError:
-            return []
+        # Served from memory; the first Tab for a command only schedules the help lookup
+        return self.option_completion.complete(command, partial_option)
 
 class SSHClient:
-    def __init__(self):
-        self.client = paramiko.SSHClient()
-        self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    CHANNEL_POOL_SIZE = 2
+    LATENCY_SAMPLES = 20
+    CONNECT_TIMEOUT = 10  # seconds, for the TCP connect, banner and authentication each
+    KEEPALIVE_INTERVAL = 30  # seconds, 0 disables keepalives
+
+    def __init__(self, host_key_policy=None):
+        self.host_key_policy = host_key_policy or KnownHostsPolicy(config_path("known_hosts"))
+        self.client = self.new_client()
         self.current_directory = None
+        self.connect_args = None
+        self.last_error = None
+        self.auth_failed = False  # the last connect got as far as authentication and was refused
+        self.sftp_session = None
+        self.listing_session = None
+        self.listing_lock = threading.Lock()
+        self.channel_pool = queue.Queue()
+        self.pool_lock = threading.Lock()
+        self.sftp_lock = threading.Lock()
+        self.reconnect_lock = threading.Lock()
+        self.reconnects = 0
+        self.latencies = collections.deque(maxlen=self.LATENCY_SAMPLES)
 
-    def connect(self, hostname, username, password):
+    def new_client(self):
+        # Host keys seen before are trusted from our own known_hosts file as well as the
+        # system one; new ones are added to ours on first connect
+        client = paramiko.SSHClient()
         try:
-            self.client.connect(hostname, username=username, password=password)
-            _, stdout, _ = self.client.exec_command("pwd")
-            self.current_directory = stdout.read().decode().strip()
+            client.load_system_host_keys()
+        except IOError:
+            pass
+        try:
+            # Loaded into the system keys so paramiko never rewrites the file itself
+            client.load_system_host_keys(self.host_key_policy.path)
+        except IOError:
+            pass
+        client.set_missing_host_key_policy(self.host_key_policy)
+        return client
+
+    def connect(self, hostname, username, password=None, port=22, key_filename=None,
+                timeout=CONNECT_TIMEOUT, keepalive=KEEPALIVE_INTERVAL):
+        # Blocks for the whole handshake; the terminal calls this from a worker thread.
+        # The working directory is not looked up here: the remote shell reports it with
+        # its first prompt.
+        self.connect_args = dict(hostname=hostname, username=username, password=password, port=port,
+                                 key_filename=key_filename, timeout=timeout, keepalive=keepalive)
+        try:
+            self._connect(**self.connect_args)
+            self.fill_channel_pool()
             return True
         except Exception as e:
-            print(f"Failed to connect: {str(e)}")
+            # Callers report last_error themselves
+            self.last_error = e
+            # paramiko raises a plain SSHException when there was nothing to offer at all
+            self.auth_failed = (isinstance(e, paramiko.AuthenticationException)
+                                or str(e) == "No authentication methods available")
             return False
 
-    def execute_command(self, command):
-        if not self.client:
-            return "Not connected to any server"
-        
-        if command.startswith("cd "):
-            return self.change_directory(command[3:].strip())
-        else:
-            stdin, stdout, stderr = self.client.exec_command(f"cd {self.current_directory}; {command}")
-            return stdout.read().decode()
-
-    def change_directory(self, new_dir):
-        _, stdout, stderr = self.client.exec_command(f"cd {self.current_directory}; cd {new_dir}; pwd")
-        new_path = stdout.read().decode().strip()
-        error = stderr.read().decode().strip()
-        
-        if error:
-            return f"Error: {error}"
-        else:
-            self.current_directory = new_path
-            return f"Changed directory to {new_path}"
+    def _connect(self, hostname, username, password, port, key_filename, timeout, keepalive):
+        # With a password, skip the agent and key attempts that would only cost round trips
+        use_keys = password is None or key_filename is not None
+        self.client.connect(
+            hostname, port=port, username=username, password=password, key_filename=key_filename,
+            timeout=timeout, banner_timeout=timeout, auth_timeout=timeout,
+            allow_agent=use_keys, look_for_keys=use_keys and key_filename is None,
+        )
+        if keepalive:
+            self.client.get_transport().set_keepalive(keepalive)
+
+    def cancel(self):
+        # Called from another thread to abort a connect in progress
+        self.client.close()
+
+    def is_active(self):
+        transport = self.client.get_transport()
+        return transport is not None and transport.is_active()
+
+    def reconnect(self):
+        self.close()
+        self.client = self.new_client()
+        self._connect(**self.connect_args)
+        self.reconnects += 1
+        self.fill_channel_pool()
+
+    def with_reconnect(self, operation):
+        # Retry once on a fresh connection if the transport died underneath us
+        try:
+            return operation()
+        except (paramiko.SSHException, EOFError, OSError):
+            if self.connect_args is None or self.is_active():
+                raise
+        # Several workers can see the same dropped link; only the first one reconnects
+        with self.reconnect_lock:
+            if not self.is_active():
+                self.reconnect()
+        return operation()
+
+    def open_command_channel(self, command, in_current_directory=True, combine_stderr=True):
+        def open_channel():
+            channel = self.take_pooled_channel() or self.client.get_transport().open_session()
+            channel.set_combine_stderr(combine_stderr)
+            cd = in_current_directory and self.current_directory
+            channel.exec_command(f"cd {shlex.quote(self.current_directory)}; {command}" if cd else command)
+            return channel
+        channel = self.with_reconnect(open_channel)
+        threading.Thread(target=self.fill_channel_pool, daemon=True).start()
+        return channel
+
+    def open_shell(self, columns=80, rows=24):
+        def open_channel():
+            channel = self.take_pooled_channel() or self.client.get_transport().open_session()
+            channel.get_pty(term="dumb", width=columns, height=rows)
+            channel.invoke_shell()
+            return channel
+        return self.with_reconnect(open_channel)
+
+    def take_pooled_channel(self):
+        while True:
+            try:
+                channel = self.channel_pool.get_nowait()
+            except queue.Empty:
+                return None
+            if not channel.closed and channel.get_transport().is_active():
+                return channel
+
+    def fill_channel_pool(self):
+        # Session channels are single use, so keep a few opened ahead of time to
+        # take the channel-open round trip off the command path
+        with self.pool_lock:
+            try:
+                while self.channel_pool.qsize() < self.CHANNEL_POOL_SIZE and self.is_active():
+                    started = time.perf_counter()
+                    channel = self.client.get_transport().open_session()
+                    self.latencies.append(time.perf_counter() - started)
+                    self.channel_pool.put(channel)
+            except paramiko.SSHException:
+                pass
+
+    def get_sftp(self):
+        # One long-lived SFTP session shared by the explorer and the viewer
+        with self.sftp_lock:
+            session = self.sftp_session
+            if session is None or session.get_channel().closed:
+                # self.open_sftp looks up self.client on each call, so a retry uses the new connection
+                self.sftp_session = self.with_reconnect(self.open_sftp)
+            return self.sftp_session
 
     def open_sftp(self):
         return self.client.open_sftp()
 
+    def iter_directory(self, path, page_size=500):
+        # Yields pages of SFTPAttributes. listdir_iter pipelines READDIR requests but reads
+        # packets itself, so it gets its own SFTP session and runs one listing at a time.
+        with self.listing_lock:
+            if self.listing_session is None or self.listing_session.get_channel().closed:
+                self.listing_session = self.with_reconnect(self.open_sftp)
+            page = []
+            for attr in self.listing_session.listdir_iter(path):
+                page.append(attr)
+                if len(page) >= page_size:
+                    yield page
+                    page = []
+            if page:
+                yield page
+
+    def measure_latency(self):
+        started = time.perf_counter()
+        self.client.get_transport().global_request("keepalive@openssh.com", wait=True)
+        latency = time.perf_counter() - started
+        self.latencies.append(latency)
+        return latency
+
+    def stats(self):
+        latencies = list(self.latencies)
+        return {
+            "connected": self.is_active(),
+            "reconnects": self.reconnects,
+            "sftp_open": self.sftp_session is not None and not self.sftp_session.get_channel().closed,
+            "pooled_channels": self.channel_pool.qsize(),
+            "last_latency_ms": latencies[-1] * 1000 if latencies else None,
+            "average_latency_ms": sum(latencies) / len(latencies) * 1000 if latencies else None,
+        }
+
     def close(self):
+        while True:
+            channel = self.take_pooled_channel()
+            if channel is None:
+                break
+            channel.close()
+        if self.sftp_session:
+            self.sftp_session.close()
+            self.sftp_session = None
+        if self.listing_session:
+            self.listing_session.close()
+            self.listing_session = None
         if self.client:
-            self.client.close()
\ No newline at end of file
+            self.client.close()
@@ -0,0 +1,7 @@
+import os
+
+CONFIG_DIR = os.path.join(os.path.expanduser("~"), ".systermin")
+
+def config_path(name):
+    os.makedirs(CONFIG_DIR, exist_ok=True)
+    return os.path.join(CONFIG_DIR, name)
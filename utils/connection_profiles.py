@@ -0,0 +1,60 @@
+import json
+import os
+from utils.command_processor import SSHClient
+
+class ConnectionProfiles:
+    # Saved SSH connections, most recently used first. Passwords are never written out:
+    # a profile records whether it needs one, and agent or key profiles connect without
+    # any prompt. Host keys are kept separately in SSHClient's known_hosts file.
+    MAX_PROFILES = 20
+    DEFAULTS = {
+        "port": 22,
+        "key_filename": None,
+        "password_auth": False,
+        "timeout": SSHClient.CONNECT_TIMEOUT,
+        "keepalive": SSHClient.KEEPALIVE_INTERVAL,
+        "directory": None,  # last remote working directory, restored on reconnect
+    }
+
+    def __init__(self, path):
+        self.path = path
+        self.profiles = []
+        try:
+            with open(self.path, "r", encoding="utf-8") as profiles_file:
+                self.profiles = [dict(self.DEFAULTS, **profile) for profile in json.load(profiles_file)]
+        except (FileNotFoundError, ValueError):
+            pass
+
+    @staticmethod
+    def name(profile):
+        port = f":{profile['port']}" if profile["port"] != 22 else ""
+        return f"{profile['username']}@{profile['hostname']}{port}"
+
+    def find(self, name):
+        for profile in self.profiles:
+            if self.name(profile) == name:
+                return profile
+        return None
+
+    def names(self):
+        return [self.name(profile) for profile in self.profiles]
+
+    def new_profile(self, hostname, username, **settings):
+        return dict(self.DEFAULTS, hostname=hostname, username=username, **settings)
+
+    def save(self, profile):
+        # Moves the profile to the front of the list
+        name = self.name(profile)
+        self.profiles = [profile] + [other for other in self.profiles if self.name(other) != name]
+        del self.profiles[self.MAX_PROFILES:]
+        self._write()
+
+    def remove(self, name):
+        self.profiles = [profile for profile in self.profiles if self.name(profile) != name]
+        self._write()
+
+    def _write(self):
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as profiles_file:
+            json.dump(self.profiles, profiles_file, indent=2)
+        os.replace(temporary_path, self.path)
@@ -0,0 +1,99 @@
+import collections
+import os
+import threading
+import time
+
+class DirectoryCache:
+    MAX_DIRECTORIES = 128
+    MAX_ENTRIES = 500000
+
+    def __init__(self, max_directories=MAX_DIRECTORIES, max_entries=MAX_ENTRIES):
+        self.max_directories = max_directories
+        self.max_entries = max_entries
+        # path -> (mtime_ns, [(name, is_dir), ...]), in LRU order
+        self.directories = collections.OrderedDict()
+        self.total_entries = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def list(self, path):
+        # Raises OSError like os.listdir when the directory cannot be read
+        path = os.path.abspath(path)
+        mtime = os.stat(path).st_mtime_ns
+        with self.lock:
+            cached = self.directories.get(path)
+            if cached and cached[0] == mtime:
+                self.directories.move_to_end(path)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+        entries = self.scan(path)
+        with self.lock:
+            self._remove(path)
+            self.directories[path] = (mtime, entries)
+            self.total_entries += len(entries)
+            while len(self.directories) > 1 and (
+                len(self.directories) > self.max_directories or self.total_entries > self.max_entries
+            ):
+                _, (_, evicted) = self.directories.popitem(last=False)
+                self.total_entries -= len(evicted)
+        return entries
+
+    def scan(self, path):
+        entries = []
+        with os.scandir(path) as iterator:
+            for entry in iterator:
+                try:
+                    # DirEntry.is_dir() answers from the d_type returned by readdir where possible
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                entries.append((entry.name, is_dir))
+        entries.sort(key=lambda item: item[0].lower())
+        return entries
+
+    def invalidate(self, path):
+        with self.lock:
+            self._remove(os.path.abspath(path))
+
+    def _remove(self, path):
+        removed = self.directories.pop(path, None)
+        if removed:
+            self.total_entries -= len(removed[1])
+
+class RemoteDirectoryCache:
+    TTL = 30  # seconds
+    MAX_DIRECTORIES = 128
+
+    def __init__(self, ttl=TTL, max_directories=MAX_DIRECTORIES):
+        self.ttl = ttl
+        self.max_directories = max_directories
+        # path -> (fetched_at, [(name, is_dir), ...]), in LRU order
+        self.directories = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, path):
+        with self.lock:
+            cached = self.directories.get(path)
+            if cached is None:
+                return None
+            if time.monotonic() - cached[0] > self.ttl:
+                del self.directories[path]
+                return None
+            self.directories.move_to_end(path)
+            return cached[1]
+
+    def put(self, path, entries):
+        with self.lock:
+            self.directories[path] = (time.monotonic(), entries)
+            self.directories.move_to_end(path)
+            while len(self.directories) > self.max_directories:
+                self.directories.popitem(last=False)
+
+    def invalidate(self, path=None):
+        with self.lock:
+            if path is None:
+                self.directories.clear()
+            else:
+                self.directories.pop(path, None)
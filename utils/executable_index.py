@@ -0,0 +1,124 @@
+import bisect
+import json
+import os
+import subprocess
+import threading
+import time
+
+class ExecutableIndex:
+    CHECK_INTERVAL = 2.0  # seconds between PATH mtime checks
+
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path
+        self.names = []  # sorted, for bisect prefix lookups
+        self.dir_mtimes = {}
+        self.last_check = 0
+        self.lock = threading.Lock()
+        self.build_thread = None
+        self.refresh_async(use_cache=True)
+
+    def path_dirs(self):
+        dirs = []
+        for directory in os.environ.get("PATH", "").split(os.pathsep):
+            if directory and directory not in dirs:
+                dirs.append(directory)
+        return dirs
+
+    def current_mtimes(self):
+        mtimes = {}
+        for directory in self.path_dirs():
+            try:
+                mtimes[directory] = os.stat(directory).st_mtime_ns
+            except OSError:
+                pass
+        return mtimes
+
+    def refresh_async(self, use_cache=False):
+        with self.lock:
+            if self.build_thread and self.build_thread.is_alive():
+                return
+            self.build_thread = threading.Thread(target=self._build, args=(use_cache,), daemon=True)
+            self.build_thread.start()
+
+    def _build(self, use_cache):
+        mtimes = self.current_mtimes()
+        if use_cache and self._load_cache(mtimes):
+            return
+        names = set()
+        for directory in mtimes:
+            names.update(self._scan_directory(directory))
+        if os.name == "nt":
+            names.update(self._shell_commands())
+        self.names = sorted(names)
+        self.dir_mtimes = mtimes
+        self._save_cache()
+
+    def _scan_directory(self, directory):
+        if os.name == "nt":
+            extensions = {ext.lower() for ext in os.environ.get("PATHEXT", ".EXE;.BAT;.CMD").split(";") if ext}
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if not entry.is_file():
+                            continue
+                    except OSError:
+                        continue
+                    if os.name == "nt":
+                        name, ext = os.path.splitext(entry.name)
+                        if ext.lower() in extensions:
+                            yield name
+                            yield entry.name
+                    elif os.access(entry.path, os.X_OK):
+                        yield entry.name
+        except OSError:
+            return
+
+    def _shell_commands(self):
+        # PowerShell cmdlets, functions and aliases are not files on PATH
+        try:
+            output = subprocess.check_output(
+                "powershell.exe -NoProfile -Command \"Get-Command -CommandType Cmdlet,Function,Alias | Select-Object -ExpandProperty Name\"",
+                shell=True, text=True, stderr=subprocess.DEVNULL
+            )
+            return [line.strip() for line in output.splitlines() if line.strip()]
+        except (subprocess.CalledProcessError, OSError):
+            return []
+
+    def _load_cache(self, mtimes):
+        if not self.cache_path:
+            return False
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as cache_file:
+                cache = json.load(cache_file)
+        except (OSError, ValueError):
+            return False
+        if cache.get("mtimes") != mtimes:
+            return False
+        self.names = cache.get("names", [])
+        self.dir_mtimes = mtimes
+        return True
+
+    def _save_cache(self):
+        if not self.cache_path:
+            return
+        try:
+            with open(self.cache_path, "w", encoding="utf-8") as cache_file:
+                json.dump({"mtimes": self.dir_mtimes, "names": self.names}, cache_file)
+        except OSError:
+            pass
+
+    def check_stale(self):
+        now = time.monotonic()
+        if now - self.last_check < self.CHECK_INTERVAL:
+            return
+        self.last_check = now
+        if self.current_mtimes() != self.dir_mtimes:
+            self.refresh_async()
+
+    def complete(self, prefix):
+        self.check_stale()
+        names = self.names
+        start = bisect.bisect_left(names, prefix)
+        end = bisect.bisect_left(names, prefix + "\U0010ffff", start)
+        return names[start:end]
@@ -0,0 +1,221 @@
+import codecs
+import ctypes
+import ctypes.util
+import os
+import queue
+import select
+import sys
+import threading
+
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_DELETE_SELF | IN_MOVE_SELF
+
+class Inotify:
+    # Just enough of inotify to sleep until a watched file changes
+    def __init__(self, libc, fd):
+        self.libc = libc
+        self.fd = fd
+        self.wd = None
+
+    @classmethod
+    def create(cls):
+        # None where inotify is unavailable; callers fall back to polling
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        return cls(libc, fd) if fd >= 0 else None
+
+    def watch(self, path):
+        # Re-pointed at the path after rotation, since the old watch follows the old inode
+        if self.wd is not None:
+            self.libc.inotify_rm_watch(self.fd, self.wd)
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        self.wd = wd if wd >= 0 else None
+        return self.wd is not None
+
+    def wait(self, timeout):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if ready:
+            try:
+                while os.read(self.fd, 4096):
+                    pass
+            except BlockingIOError:
+                pass
+        return bool(ready)
+
+    def close(self):
+        os.close(self.fd)
+
+class LocalFollowTarget:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+
+    def size(self):
+        return os.fstat(self.file.fileno()).st_size
+
+    def read(self, offset, length):
+        self.file.seek(offset)
+        return self.file.read(length)
+
+    def replaced(self):
+        # The path now names a different file, e.g. after logrotate moved the old one away
+        try:
+            return os.stat(self.path).st_ino != os.fstat(self.file.fileno()).st_ino
+        except FileNotFoundError:
+            return False  # Not recreated yet; keep reading the old file
+
+    def reopen(self):
+        self.file.close()
+        self.file = open(self.path, "rb")
+
+    def close(self):
+        self.file.close()
+
+class RemoteFollowTarget:
+    # SFTP attributes carry no inode, so a rotation is only noticed when the size shrinks
+    def __init__(self, sftp, path):
+        self.sftp = sftp
+        self.path = path
+        self.file = sftp.open(path, "rb")
+
+    def size(self):
+        return self.sftp.stat(self.path).st_size
+
+    def read(self, offset, length):
+        self.file.seek(offset)
+        return self.file.read(length)
+
+    def replaced(self):
+        return False
+
+    def reopen(self):
+        self.file.close()
+        self.file = self.sftp.open(self.path, "rb")
+
+    def close(self):
+        self.file.close()
+        self.sftp.close()
+
+class FileFollower:
+    # Follows a growing file like `tail -f`: only bytes past the last read offset are fetched.
+    # The worker thread publishes text chunks, and ("truncated",) or ("rotated",) events, on a queue.
+    POLL_INTERVAL = 0.5  # seconds between checks without inotify
+    REMOTE_POLL_INTERVAL = 1.0
+    MAX_READ = 1024 * 1024  # bytes read per check; more is picked up without waiting
+    TAIL_BYTES = 64 * 1024  # how much of the existing file is shown when following starts
+
+    def __init__(self, path, sftp=None, tail_bytes=TAIL_BYTES):
+        # A given SFTP session is owned by the follower and closed when it stops
+        self.path = path
+        self.sftp = sftp
+        self.tail_bytes = tail_bytes
+        self.output_queue = queue.Queue()
+        self.offset = 0
+        self.stopped = threading.Event()
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        inotify = None
+        try:
+            if self.sftp is not None:
+                target = RemoteFollowTarget(self.sftp, self.path)
+                interval = self.REMOTE_POLL_INTERVAL
+            else:
+                target = LocalFollowTarget(self.path)
+                interval = self.POLL_INTERVAL
+                inotify = Inotify.create()
+                if inotify and not inotify.watch(self.path):
+                    inotify.close()
+                    inotify = None
+        except Exception as e:
+            self.output_queue.put(("error", str(e)))
+            return
+        try:
+            self.start_tail(target)
+            while not self.stopped.is_set():
+                if self.check(target, inotify):
+                    continue  # A full read; there is probably more waiting
+                if inotify:
+                    inotify.wait(interval)
+                else:
+                    self.stopped.wait(interval)
+        except Exception as e:
+            if not self.stopped.is_set():
+                self.output_queue.put(("error", str(e)))
+        finally:
+            target.close()
+            if inotify:
+                inotify.close()
+
+    def start_tail(self, target):
+        size = target.size()
+        self.offset = max(0, size - self.tail_bytes)
+        if self.offset:
+            # Start at a line boundary rather than partway through a line
+            data = target.read(self.offset, min(size - self.offset, 4096))
+            newline = data.find(b"\n")
+            if newline != -1:
+                self.offset += newline + 1
+
+    def check(self, target, inotify):
+        if target.replaced():
+            # Whatever was written before the move, read to the end of the old file
+            while not self.stopped.is_set():
+                data = target.read(self.offset, self.MAX_READ)
+                if not data:
+                    break
+                self.publish(data)
+            target.reopen()
+            if inotify:
+                inotify.watch(self.path)
+            self.reset("rotated")
+        size = target.size()
+        if size < self.offset:
+            if self.sftp is not None:
+                target.reopen()
+            self.reset("truncated")
+        if size <= self.offset:
+            return False
+        data = target.read(self.offset, min(size - self.offset, self.MAX_READ))
+        self.publish(data)
+        return len(data) == self.MAX_READ
+
+    def publish(self, data):
+        self.offset += len(data)
+        text = self.decoder.decode(data)
+        if text:
+            self.output_queue.put(text)
+
+    def reset(self, event):
+        self.offset = 0
+        self.decoder.reset()
+        self.output_queue.put((event,))
+
+    def read_output(self, max_chars=65536):
+        # Returns the text chunks and event tuples that arrived since the last call, in order
+        items, size = [], 0
+        while size < max_chars:
+            try:
+                item = self.output_queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, str):
+                size += len(item)
+                if items and isinstance(items[-1], str):
+                    items[-1] += item
+                    continue
+            items.append(item)
+        return items
+
+    def stop(self):
+        self.stopped.set()
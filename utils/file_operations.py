@@ -0,0 +1,134 @@
+import os
+import posixpath
+import queue
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class OperationCancelled(Exception):
+    pass
+
+class FileOperation:
+    def __init__(self, description, on_done=None):
+        self.description = description
+        self.on_done = on_done  # called on the Tk thread once the operation has ended, however it ended
+        self.done = 0  # items processed so far
+        self.error = None
+        self.cancel_event = threading.Event()
+
+    def advance(self, count=1):
+        # Workers report progress here, which is also where a cancel takes effect
+        if self.cancel_event.is_set():
+            raise OperationCancelled()
+        self.done += count
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+class FileOperationQueue:
+    MAX_WORKERS = 2
+
+    def __init__(self, max_workers=MAX_WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.active = []
+        self.completed = queue.Queue()
+
+    def submit(self, description, function, on_done=None):
+        operation = FileOperation(description, on_done)
+        self.active.append(operation)
+        self.executor.submit(self._run, operation, function)
+        return operation
+
+    def _run(self, operation, function):
+        try:
+            function(operation)
+        except OperationCancelled:
+            pass
+        except Exception as e:
+            operation.error = e
+        self.completed.put(operation)
+
+    def finished(self):
+        # Operations completed since the last call; to be called from the Tk thread
+        operations = []
+        while True:
+            try:
+                operation = self.completed.get_nowait()
+            except queue.Empty:
+                return operations
+            self.active.remove(operation)
+            operations.append(operation)
+
+class LocalBackend:
+    path = os.path
+
+    def create_file(self, path, operation):
+        # "x" refuses to truncate an existing file
+        open(path, "x").close()
+        operation.advance()
+
+    def make_directory(self, path, operation):
+        os.mkdir(path)
+        operation.advance()
+
+    def rename(self, old_path, new_path, operation):
+        os.rename(old_path, new_path)
+        operation.advance()
+
+    def delete(self, path, operation):
+        # Bottom-up, one entry at a time, so progress is visible and a cancel stops promptly
+        if not os.path.isdir(path) or os.path.islink(path):
+            os.remove(path)
+            operation.advance()
+            return
+        for root, dirs, files in os.walk(path, topdown=False):
+            for name in files:
+                os.remove(os.path.join(root, name))
+                operation.advance()
+            for name in dirs:
+                directory = os.path.join(root, name)
+                if os.path.islink(directory):
+                    os.remove(directory)
+                else:
+                    os.rmdir(directory)
+                operation.advance()
+        os.rmdir(path)
+        operation.advance()
+
+class SftpBackend:
+    path = posixpath
+
+    def __init__(self, sftp):
+        self.sftp = sftp
+
+    def create_file(self, path, operation):
+        self.sftp.open(path, "wx").close()
+        operation.advance()
+
+    def make_directory(self, path, operation):
+        self.sftp.mkdir(path)
+        operation.advance()
+
+    def rename(self, old_path, new_path, operation):
+        self.sftp.rename(old_path, new_path)
+        operation.advance()
+
+    def delete(self, path, operation):
+        if not stat.S_ISDIR(self.sftp.lstat(path).st_mode or 0):
+            self.sftp.remove(path)
+            operation.advance()
+            return
+        # listdir_attr returns the types with the names, so no stat round trip per entry
+        for attr in self.sftp.listdir_attr(path):
+            child = posixpath.join(path, attr.filename)
+            if stat.S_ISDIR(attr.st_mode or 0):
+                self.delete(child, operation)
+            else:
+                self.sftp.remove(child)
+                operation.advance()
+        self.sftp.rmdir(path)
+        operation.advance()
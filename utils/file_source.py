@@ -0,0 +1,257 @@
+import array
+import bisect
+import collections
+import itertools
+import mmap
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class RemoteFileSource:
+    BLOCK_SIZE = 64 * 1024
+    CACHE_BLOCKS = 64  # at most 4 MB of the file is held in memory
+    READ_AHEAD = 4
+
+    def __init__(self, sftp, path, block_size=BLOCK_SIZE, cache_blocks=CACHE_BLOCKS, read_ahead=READ_AHEAD):
+        self.path = path
+        self.block_size = block_size
+        self.cache_blocks = cache_blocks
+        self.read_ahead = read_ahead
+        self.file = sftp.open(path, "rb")
+        self.size = self.file.stat().st_size
+        self.blocks = collections.OrderedDict()  # block index -> bytes, in LRU order
+        self.prefetching = set()
+        self.lock = threading.Lock()
+        self.io_lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def read(self, offset, length):
+        offset = max(0, offset)
+        end = min(self.size, offset + length)
+        if end <= offset:
+            return b""
+        first = offset // self.block_size
+        last = (end - 1) // self.block_size
+        with self.lock:
+            missing = [index for index in range(first, last + 1) if index not in self.blocks]
+        if missing:
+            # One readv for the whole range rather than a round trip per block
+            self.fetch_blocks(missing)
+        data = b"".join(self.get_block(index) for index in range(first, last + 1))
+        self.prefetch(last + 1)
+        start = offset - first * self.block_size
+        return data[start:start + end - offset]
+
+    def get_block(self, index):
+        with self.lock:
+            block = self.blocks.get(index)
+            if block is not None:
+                self.blocks.move_to_end(index)
+                return block
+        self.fetch_blocks([index])
+        with self.lock:
+            return self.blocks.get(index, b"")
+
+    def prefetch(self, first):
+        last_block = (self.size - 1) // self.block_size
+        with self.lock:
+            wanted = [
+                index for index in range(first, min(first + self.read_ahead, last_block + 1))
+                if index not in self.blocks and index not in self.prefetching
+            ]
+            self.prefetching.update(wanted)
+        if wanted:
+            self.executor.submit(self.prefetch_blocks, wanted)
+
+    def fetch_blocks(self, indexes):
+        # readv pipelines the block requests instead of paying one round trip each
+        with self.io_lock:
+            with self.lock:
+                missing = [index for index in indexes if index not in self.blocks]
+            ranges = [
+                (index * self.block_size, min(self.block_size, self.size - index * self.block_size))
+                for index in missing
+            ]
+            chunks = list(self.file.readv(ranges)) if ranges else []
+        with self.lock:
+            for index, chunk in zip(missing, chunks):
+                self.blocks[index] = chunk
+                self.blocks.move_to_end(index)
+            while len(self.blocks) > self.cache_blocks:
+                self.blocks.popitem(last=False)
+
+    def prefetch_blocks(self, indexes):
+        try:
+            self.fetch_blocks(indexes)
+        except Exception:
+            pass  # A failed read-ahead is retried on demand by read()
+        finally:
+            with self.lock:
+                self.prefetching.difference_update(indexes)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.file.close()
+
+
+class LocalFileSource:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        self.size = os.fstat(self.file.fileno()).st_size
+        # The mapping lets the OS page the file in and out; only slices we read are copied
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+
+    def read(self, offset, length):
+        offset = max(0, offset)
+        size = os.fstat(self.file.fileno()).st_size
+        if size < self.size:
+            # Touching mapped pages past the new end of the file raises SIGBUS. A file that
+            # shrank once may shrink again, so it is read with pread from here on.
+            self.close_map()
+            self.size = size
+        length = min(length, self.size - offset)
+        if length <= 0:
+            return b""
+        if self.map is None:
+            return os.pread(self.file.fileno(), length, offset)
+        return self.map[offset:offset + length]
+
+    def close_map(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+
+    def close(self):
+        self.close_map()
+        self.file.close()
+
+class LineIndex:
+    STRIDE = 64  # one offset is kept per STRIDE lines, so the index stays small
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, source):
+        self.source = source
+        self.offsets = array.array("Q", [0])  # offsets[k] is where line k * STRIDE starts
+        self.newlines = 0
+        self.indexed_bytes = 0
+        self.ends_with_newline = False
+        self.complete = False
+        self.cancelled = False
+        self.thread = threading.Thread(target=self.build, daemon=True)
+        self.thread.start()
+
+    def build(self):
+        increment = (1).__add__
+        position = 0
+        try:
+            while position < self.source.size and not self.cancelled:
+                data = self.source.read(position, self.CHUNK_SIZE)
+                if not data:
+                    break
+                parts = data.split(b"\n")
+                # Offsets just past each newline, thinned to every STRIDE-th line
+                starts = itertools.accumulate(map(increment, map(len, parts[:-1])), initial=position)
+                next(starts)
+                first = -(self.newlines + 1) % self.STRIDE
+                self.offsets.extend(itertools.islice(starts, first, None, self.STRIDE))
+                self.newlines += len(parts) - 1
+                self.ends_with_newline = data.endswith(b"\n")
+                position += len(data)
+                self.indexed_bytes = position
+        except ValueError:
+            return  # The source was closed underneath us
+        self.complete = not self.cancelled
+
+    def line_count(self):
+        if self.indexed_bytes == 0:
+            return 0 if self.complete else 1
+        return self.newlines + (0 if self.ends_with_newline else 1)
+
+    def line_offset(self, line):
+        # Byte offset where 0-based `line` starts, or None if it has not been indexed yet
+        if line < 0 or line > self.newlines or line >= self.line_count():
+            return None
+        block = line // self.STRIDE
+        offset = self.offsets[block]
+        remaining = line - block * self.STRIDE
+        while remaining:
+            data = self.source.read(offset, self.CHUNK_SIZE)
+            position = -1
+            while remaining:
+                found = data.find(b"\n", position + 1)
+                if found == -1:
+                    break
+                position = found
+                remaining -= 1
+            offset += position + 1 if remaining == 0 else len(data)
+        return offset
+
+    def line_at_offset(self, offset):
+        block = bisect.bisect_right(self.offsets, offset) - 1
+        start = self.offsets[block]
+        return block * self.STRIDE + self.source.read(start, offset - start).count(b"\n")
+
+    def stop(self):
+        self.cancelled = True
+
+class RowIndex:
+    # Byte offset of every CSV record. A newline inside a quoted field does not end a record,
+    # so quote parity is tracked across lines.
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, source):
+        self.source = source
+        self.offsets = array.array("Q")
+        self.indexed_bytes = 0
+        self.complete = False
+        self.cancelled = False
+        self.thread = threading.Thread(target=self.build, daemon=True)
+        self.thread.start()
+
+    def build(self):
+        increment = (1).__add__
+        position = 0
+        in_quotes = False
+        try:
+            if self.source.size:
+                self.offsets.append(0)
+            while position < self.source.size and not self.cancelled:
+                data = self.source.read(position, self.CHUNK_SIZE)
+                if not data:
+                    break
+                if not in_quotes and b'"' not in data:
+                    # No quoting in this chunk: every newline ends a record
+                    starts = itertools.accumulate(map(increment, map(len, data.split(b"\n")[:-1])), initial=position)
+                    next(starts)
+                    self.offsets.extend(starts)
+                else:
+                    start = 0
+                    while True:
+                        newline = data.find(b"\n", start)
+                        if newline == -1:
+                            in_quotes ^= data.count(b'"', start) % 2 == 1
+                            break
+                        in_quotes ^= data.count(b'"', start, newline) % 2 == 1
+                        if not in_quotes:
+                            self.offsets.append(position + newline + 1)
+                        start = newline + 1
+                position += len(data)
+                self.indexed_bytes = position
+        except ValueError:
+            return  # The source was closed underneath us
+        if self.offsets and self.offsets[-1] >= self.source.size:
+            self.offsets.pop()  # The file ends with a newline; no record starts there
+        self.complete = not self.cancelled
+
+    def row_count(self):
+        # While indexing, the last known record may still be incomplete
+        return len(self.offsets) if self.complete else max(0, len(self.offsets) - 1)
+
+    def row_range(self, row):
+        start = self.offsets[row]
+        end = self.offsets[row + 1] if row + 1 < len(self.offsets) else self.source.size
+        return start, end
+
+    def stop(self):
+        self.cancelled = True
@@ -0,0 +1,159 @@
+import time
+from tkinter import font
+from pygments.lexers import get_lexer_for_filename, guess_lexer
+from pygments.styles import get_style_by_name
+from pygments.token import Token
+from pygments.util import ClassNotFound
+
+SNIFF_CHARS = 4096
+
+def lexer_for_file(path, content):
+    # The extension is authoritative; content sniffing only looks at the beginning of the file
+    try:
+        return get_lexer_for_filename(path)
+    except ClassNotFound:
+        return guess_lexer(content[:SNIFF_CHARS])
+
+class SyntaxHighlighter:
+    CHUNK_LINES = 200
+    MARGIN_LINES = 100
+    TIME_SLICE = 0.008  # seconds of tokenizing per idle callback
+
+    def __init__(self, widget, lexer, content, style_name="default", runs=None, tag_styles=None, runs_end=None):
+        self.widget = widget
+        self.style = get_style_by_name(style_name)
+        text_color = self.style.style_for_token(Token)["color"]
+        self.widget.configure(background=self.style.background_color)
+        if text_color:
+            self.widget.configure(foreground=f"#{text_color}", insertbackground=f"#{text_color}")
+        self.line = 1
+        self.column = 0
+        self.applied = set()
+        self.tag_names = {}
+        self.tag_styles = {}  # tag -> (color, bold, italic)
+        self.fonts = {}
+        self.cached_chunks = 0  # leading chunks whose runs came from the render cache
+        self.runs = {}  # chunk -> {tag: [start, end, start, end, ...]}
+        if runs is not None:
+            self.runs = dict(runs)
+            for tag, (color, bold, italic) in tag_styles.items():
+                self.configure_tag(tag, color, bold, italic)
+        if runs is not None and runs_end is None:
+            # A complete token stream from the render cache; nothing is left to tokenize
+            self.tokens = None
+            self.finished = True
+        else:
+            # The suspended generator is the resumable lexer state. Lexer state cannot be
+            # restored mid-file, so after a cached prefix (runs_end lines) the lexer starts
+            # from the top again but only records runs past the prefix.
+            if runs is not None:
+                self.cached_chunks = (runs_end - 1) // self.CHUNK_LINES
+            self.tokens = lexer.get_tokens_unprocessed(content)
+            self.finished = False
+        self.job = None
+        self.widget.configure(yscrollcommand=self.on_view_changed)
+        self.schedule()
+
+    def on_view_changed(self, first, last):
+        self.schedule()
+
+    def schedule(self):
+        if self.job is None:
+            self.job = self.widget.after(1, self.run)
+
+    def visible_lines(self):
+        first = int(self.widget.index("@0,0").split(".")[0])
+        last = int(self.widget.index(f"@0,{self.widget.winfo_height()}").split(".")[0])
+        return first, last
+
+    def run(self):
+        self.job = None
+        if not self.widget.winfo_exists():
+            return
+        first, last = self.visible_lines()
+        first_chunk = max(0, (first - self.MARGIN_LINES - 1) // self.CHUNK_LINES)
+        last_chunk = (last + self.MARGIN_LINES - 1) // self.CHUNK_LINES
+        needed_line = (last_chunk + 1) * self.CHUNK_LINES
+
+        deadline = time.perf_counter() + self.TIME_SLICE
+        while not self.finished and self.covered_line() <= needed_line and time.perf_counter() < deadline:
+            self.tokenize(500)
+
+        for chunk in range(first_chunk, last_chunk + 1):
+            chunk_done = self.finished or self.covered_line() > (chunk + 1) * self.CHUNK_LINES
+            if chunk not in self.applied and chunk_done:
+                self.apply_chunk(chunk)
+
+        if not self.finished and self.covered_line() <= needed_line:
+            self.schedule()
+
+    def covered_line(self):
+        # First line without runs yet, counting the cached prefix
+        return max(self.line, self.cached_chunks * self.CHUNK_LINES + 1)
+
+    def tokenize(self, count):
+        for _ in range(count):
+            try:
+                _, token_type, value = next(self.tokens)
+            except StopIteration:
+                self.finished = True
+                return
+            start_line, start_column = self.line, self.column
+            newlines = value.count("\n")
+            if newlines:
+                self.line += newlines
+                self.column = len(value) - value.rfind("\n") - 1
+            else:
+                self.column += len(value)
+            tag = self.tag_for(token_type)
+            if tag and (start_line - 1) // self.CHUNK_LINES >= self.cached_chunks:
+                chunk = self.runs.setdefault((start_line - 1) // self.CHUNK_LINES, {})
+                chunk.setdefault(tag, []).extend(
+                    (f"{start_line}.{start_column}", f"{self.line}.{self.column}")
+                )
+
+    def apply_chunk(self, chunk):
+        # One tag_add per tag per chunk, each carrying all of that tag's ranges
+        for tag, indexes in self.runs.get(chunk, {}).items():
+            self.widget.tag_add(tag, *indexes)
+        self.applied.add(chunk)
+
+    def tag_for(self, token_type):
+        if token_type in self.tag_names:
+            return self.tag_names[token_type]
+        token_style = self.style.style_for_token(token_type)
+        tag = None
+        if token_style["color"]:
+            color, bold, italic = token_style["color"], bool(token_style["bold"]), bool(token_style["italic"])
+            tag = f"syntax_{color}_{int(bold)}{int(italic)}"
+            if tag not in self.tag_styles:
+                self.configure_tag(tag, color, bold, italic)
+        self.tag_names[token_type] = tag
+        return tag
+
+    def configure_tag(self, tag, color, bold, italic):
+        options = {"foreground": f"#{color}"}
+        if bold or italic:
+            options["font"] = self.font_for(bold, italic)
+        self.widget.tag_configure(tag, **options)
+        self.tag_styles[tag] = (color, bold, italic)
+
+    def snapshot(self):
+        # Runs for the render cache: (runs, tag_styles, runs_end). Large files are rarely
+        # tokenized to the end, so an unfinished highlighter gives its completed chunks and
+        # runs_end, the first line they do not cover; runs_end is None for the whole file.
+        if self.finished:
+            return self.runs, self.tag_styles, None
+        complete = (self.covered_line() - 1) // self.CHUNK_LINES
+        if complete == 0:
+            return None
+        runs = {chunk: tags for chunk, tags in self.runs.items() if chunk < complete}
+        return runs, self.tag_styles, complete * self.CHUNK_LINES + 1
+
+    def font_for(self, bold, italic):
+        key = (bold, italic)
+        if key not in self.fonts:
+            derived = font.Font(font=self.widget.cget("font"))
+            derived.configure(weight="bold" if bold else "normal", slant="italic" if italic else "roman")
+            self.fonts[key] = derived
+        return self.fonts[key]
@@ -0,0 +1,160 @@
+import bisect
+import itertools
+import os
+import threading
+
+class CommandHistory:
+    MAX_ENTRIES = 100000
+    LOAD_BATCH = 10000  # lines added to the index per lock hold while loading
+    SMALL_RANGE = 2048  # prefix ranges up to this size are sorted by recency up front
+
+    def __init__(self, path):
+        self.path = path
+        # command -> sequence number; dict order doubles as recency order (oldest first)
+        self.sequence = {}
+        self.sorted_commands = []
+        self.counter = 0
+        self.pending = []
+        self.lock = threading.Lock()
+        self.loaded = threading.Event()
+        threading.Thread(target=self._load, daemon=True).start()
+
+    def _load(self):
+        # Batches go in under the lock, so searches made while loading see what has
+        # been read so far instead of waiting for the whole file
+        lines = 0
+        try:
+            with open(self.path, "r", encoding="utf-8", errors="replace") as history_file:
+                while True:
+                    batch = [line.rstrip("\n") for line in itertools.islice(history_file, self.LOAD_BATCH)]
+                    if not batch:
+                        break
+                    with self.lock:
+                        for command in batch:
+                            if command:
+                                self._add_entry(command)
+                                lines += 1
+        except FileNotFoundError:
+            pass
+        with self.lock:
+            self.sorted_commands = sorted(self.sequence)
+            for command in self.pending:
+                self._index(command)
+            self.pending = []
+            self.loaded.set()
+        if lines > 2 * len(self.sequence) or len(self.sequence) > self.MAX_ENTRIES:
+            self.compact()
+
+    def _add_entry(self, command):
+        self.sequence.pop(command, None)
+        self.counter += 1
+        self.sequence[command] = self.counter
+
+    def _index(self, command):
+        if command not in self.sequence:
+            bisect.insort(self.sorted_commands, command)
+        self._add_entry(command)
+
+    def add(self, command):
+        command = command.replace("\n", " ").strip()
+        if not command:
+            return
+        with self.lock:
+            if self.loaded.is_set():
+                self._index(command)
+            else:
+                self.pending.append(command)
+            try:
+                with open(self.path, "a", encoding="utf-8") as history_file:
+                    history_file.write(command + "\n")
+            except OSError:
+                pass
+
+    def compact(self):
+        # Rewrite the append-only file with one line per unique command, oldest first
+        with self.lock:
+            commands = list(self.sequence)[-self.MAX_ENTRIES:]
+            if len(commands) < len(self.sequence):
+                self.sequence = {command: self.sequence[command] for command in commands}
+                self.sorted_commands = sorted(self.sequence)
+            temp_path = self.path + ".tmp"
+            try:
+                with open(temp_path, "w", encoding="utf-8") as history_file:
+                    history_file.writelines(command + "\n" for command in commands)
+                os.replace(temp_path, self.path)
+            except OSError:
+                pass
+
+    def snapshot(self):
+        # Unique commands, newest first. While loading this is what has been read so far,
+        # plus the commands added meanwhile, which are newer than anything in the file.
+        with self.lock:
+            commands = list(self.sequence)
+            pending = list(dict.fromkeys(reversed(self.pending)))
+        seen = set(pending)
+        return pending + [command for command in reversed(commands) if command not in seen]
+
+    def prefix_matches(self, prefix):
+        # Yields unique commands starting with prefix, newest first. Never waits for the
+        # loader; a search started early just sees less history.
+        if not self.loaded.is_set():
+            return iter([command for command in self.snapshot() if command.startswith(prefix)])
+        if not prefix:
+            return iter(self.snapshot())
+        with self.lock:
+            start = bisect.bisect_left(self.sorted_commands, prefix)
+            end = bisect.bisect_left(self.sorted_commands, prefix + "\U0010ffff", start)
+            if end - start <= self.SMALL_RANGE:
+                matches = self.sorted_commands[start:end]
+                return iter(sorted(matches, key=self.sequence.__getitem__, reverse=True))
+        # A short prefix matches most of the history, so walking by recency finds hits quickly
+        return (command for command in self.snapshot() if command.startswith(prefix))
+
+    def fuzzy_search(self, query, limit=100):
+        # Commands containing the query's characters in order, newest first. An all
+        # lowercase query matches case-insensitively.
+        commands = self.snapshot()
+        # Commands hold no newlines, so one lower() over the joined list folds them all at once
+        haystacks = "\n".join(commands).lower().split("\n") if query == query.lower() else commands
+        matches = []
+        for command, haystack in zip(commands, haystacks):
+            position = 0
+            for char in query:
+                position = haystack.find(char, position) + 1
+                if not position:
+                    break
+            else:
+                matches.append(command)
+                if len(matches) >= limit:
+                    break
+        return matches
+
+    def navigate(self, prefix):
+        return HistoryNavigator(self, prefix)
+
+class HistoryNavigator:
+    def __init__(self, history, prefix):
+        self.prefix = prefix
+        self.matches = []
+        self.source = history.prefix_matches(prefix)
+        self.position = -1
+        self.current = prefix
+
+    def previous(self):
+        if self.position + 1 >= len(self.matches):
+            command = next(self.source, None)
+            if command == self.prefix:
+                command = next(self.source, None)
+            if command is None:
+                return None
+            self.matches.append(command)
+        self.position += 1
+        self.current = self.matches[self.position]
+        return self.current
+
+    def next(self):
+        if self.position < 0:
+            return None
+        self.position -= 1
+        self.current = self.matches[self.position] if self.position >= 0 else self.prefix
+        return self.current
@@ -0,0 +1,122 @@
+import json
+import re
+
+TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"|"|[\[\]{},:]', re.DOTALL)
+QUOTE, COLON = ord('"'), ord(":")
+OPENERS, CLOSERS = b"[{", b"]}"
+WHITESPACE = b" \t\r\n"
+
+class JsonScanner:
+    # Finds the byte spans of a container's children without decoding them, so a value is
+    # only parsed when it is shown. Works on any byte source with read(offset, length).
+    CHUNK_SIZE = 1024 * 1024
+    PREVIEW_BYTES = 200
+
+    def __init__(self, source):
+        self.source = source
+
+    def value_start(self, start=0, end=None):
+        # Offset of the first non-whitespace byte in [start, end)
+        end = self.source.size if end is None else end
+        while start < end:
+            data = self.source.read(start, min(self.CHUNK_SIZE, end - start))
+            stripped = data.lstrip(WHITESPACE)
+            if stripped:
+                return start + len(data) - len(stripped)
+            start += len(data)
+        return end
+
+    def kind(self, start, end):
+        first = self.source.read(start, 1)
+        if first == b"{":
+            return "object"
+        if first == b"[":
+            return "array"
+        return "scalar"
+
+    def preview(self, start, end):
+        if end - start > self.PREVIEW_BYTES:
+            return self.source.read(start, self.PREVIEW_BYTES).decode("utf-8", errors="replace") + "…"
+        data = self.source.read(start, end - start)
+        try:
+            value = json.loads(data)
+        except ValueError:
+            return data.decode("utf-8", errors="replace")
+        return json.dumps(value, ensure_ascii=False)
+
+    def iter_children(self, start):
+        # Yields (key, value start, value end) for the object or array opening at `start`.
+        # Keys are strings for objects and indexes for arrays.
+        is_object = self.source.read(start, 1) == b"{"
+        depth = 0
+        key = None
+        child_start = start + 1
+        index = 0
+        position = start
+        chunk_size = self.CHUNK_SIZE
+        while position < self.source.size:
+            data = self.source.read(position, chunk_size)
+            chunk_size = self.CHUNK_SIZE
+            for match in TOKEN.finditer(data):
+                char = data[match.start()]
+                if char == QUOTE:
+                    if match.end() - match.start() == 1:
+                        if position + len(data) >= self.source.size:
+                            return  # An unterminated string; the document is truncated
+                        # The string continues past this chunk; rescan from its opening quote
+                        chunk_size = 2 * len(data)
+                        data = data[:match.start()]
+                        break
+                    if depth == 1 and is_object and key is None:
+                        key = json.loads(match.group())
+                    continue
+                if char in OPENERS:
+                    depth += 1
+                    continue
+                if char in CLOSERS:
+                    depth -= 1
+                    if depth:
+                        continue
+                elif char == COLON:
+                    if depth == 1:
+                        child_start = position + match.end()
+                    continue
+                elif depth != 1:
+                    continue
+                offset = position + match.start()
+                value_start = self.value_start(child_start, offset)
+                if value_start < offset:
+                    tail = self.source.read(max(value_start, offset - 64), offset - max(value_start, offset - 64))
+                    value_end = offset - (len(tail) - len(tail.rstrip(WHITESPACE)))
+                    yield (key if is_object else index), value_start, value_end
+                    index += 1
+                if depth == 0:
+                    return
+                child_start = offset + 1
+                key = None
+            position += len(data)
+
+    def iter_lines(self, start=0):
+        # Yields (line number, start, end) for each non-blank line; used for JSON Lines files
+        line = 0
+        position = start
+        line_start = start
+        while position < self.source.size:
+            data = self.source.read(position, self.CHUNK_SIZE)
+            offset = 0
+            while True:
+                newline = data.find(b"\n", offset)
+                if newline == -1:
+                    break
+                line_end = position + newline
+                value_start = self.value_start(line_start, line_end)
+                if value_start < line_end:
+                    yield line, value_start, line_end
+                line += 1
+                line_start = line_end + 1
+                offset = newline + 1
+            position += len(data)
+        if line_start < self.source.size:
+            value_start = self.value_start(line_start)
+            if value_start < self.source.size:
+                yield line, value_start, self.source.size
@@ -0,0 +1,128 @@
+import collections
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+OPTION_PATTERN = re.compile(r"(?<![\w-])(--?[A-Za-z0-9][\w-]*)")
+OVERSTRIKE = re.compile(r".\x08")
+COMMAND_NAME = re.compile(r"[\w][\w.+-]*")  # anything else is never handed to a help lookup
+
+class OptionCompletionProvider:
+    MAX_COMMANDS = 256
+    HELP_TIMEOUT = 5  # seconds
+
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path
+        # command -> ([executable path, mtime_ns], sorted options), in LRU order
+        self.cache = collections.OrderedDict()
+        self.pending = set()
+        self.lock = threading.Lock()
+        self.save_lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.executor.submit(self._load)
+
+    def complete(self, command, partial_option):
+        options = self.get_options(command)
+        if not options:
+            return []
+        return [opt for opt in options if opt.startswith(partial_option)]
+
+    def get_options(self, command):
+        # Returns the cached options, or None while they are fetched in the background.
+        # Entries are tied to the executable's path and mtime, so an upgrade refetches them.
+        if not COMMAND_NAME.fullmatch(command):
+            return []
+        key = self.executable_key(command)
+        with self.lock:
+            cached = self.cache.get(command)
+            if cached is not None and cached[0] == key:
+                self.cache.move_to_end(command)
+                return cached[1]
+            if command not in self.pending:
+                self.pending.add(command)
+                self.executor.submit(self._fetch, command, key)
+        return None
+
+    def executable_key(self, command):
+        path = shutil.which(command)
+        if path is None:
+            return None
+        try:
+            return [path, os.stat(path).st_mtime_ns]
+        except OSError:
+            return None
+
+    def _fetch(self, command, key):
+        try:
+            options = self.parse_options(self.read_help(command))
+        except Exception:
+            options = []
+        with self.lock:
+            self.cache[command] = (key, options)
+            self.cache.move_to_end(command)
+            while len(self.cache) > self.MAX_COMMANDS:
+                self.cache.popitem(last=False)
+            self.pending.discard(command)
+        self._save()
+
+    def read_help(self, command):
+        # Only documentation is read; the command itself is never started, since not every
+        # program treats --help as harmless
+        if os.name == "nt":
+            return self._run(["powershell.exe", "-NoProfile", "-Command", "Get-Help", command])
+        text = self._run(["man", command], env=dict(os.environ, MANPAGER="cat", MANWIDTH="200"))
+        return OVERSTRIKE.sub("", text)
+
+    def _run(self, args, **kwargs):
+        try:
+            result = subprocess.run(
+                args,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                timeout=self.HELP_TIMEOUT,
+                text=True,
+                errors="replace",
+                **kwargs
+            )
+            return result.stdout
+        except (OSError, subprocess.SubprocessError):
+            return ""
+
+    def parse_options(self, text):
+        options = set()
+        for line in text.splitlines():
+            if line.strip().startswith("-"):
+                options.update(OPTION_PATTERN.findall(line))
+        return sorted(options)
+
+    def _load(self):
+        if not self.cache_path:
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as cache_file:
+                cached = json.load(cache_file)
+        except (OSError, ValueError):
+            return
+        with self.lock:
+            # Anything fetched since startup is more recent than the persisted entries
+            for command, entry in reversed(list(cached.items())[-self.MAX_COMMANDS:]):
+                if command not in self.cache and isinstance(entry, list) and len(entry) == 2:
+                    self.cache[command] = tuple(entry)
+                    self.cache.move_to_end(command, last=False)
+
+    def _save(self):
+        if not self.cache_path:
+            return
+        with self.lock:
+            snapshot = dict(self.cache)
+        with self.save_lock:
+            try:
+                with open(self.cache_path, "w", encoding="utf-8") as cache_file:
+                    json.dump(snapshot, cache_file)
+            except OSError:
+                pass
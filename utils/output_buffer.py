@@ -0,0 +1,46 @@
+import tkinter as tk
+
+class OutputBuffer:
+    FLUSH_INTERVAL = 16  # ms, roughly one frame
+    OUTPUT_MARK = "output_end"
+
+    def __init__(self, widget, on_flush=None, interval=FLUSH_INTERVAL, input_mark=None):
+        # With input_mark (a left-gravity mark where the pending input line starts), output
+        # goes in front of the input line and the mark is moved past it, so text typed
+        # while a command is printing stays below the output
+        self.widget = widget
+        self.on_flush = on_flush
+        self.interval = interval
+        self.input_mark = input_mark
+        if input_mark is not None:
+            self.widget.mark_set(self.OUTPUT_MARK, input_mark)
+            self.widget.mark_gravity(self.OUTPUT_MARK, tk.RIGHT)
+        self.pending = []
+        self.flush_job = None
+
+    def write(self, text):
+        if not text:
+            return
+        self.pending.append(text)
+        if self.flush_job is None:
+            self.flush_job = self.widget.after(self.interval, self.flush)
+
+    def flush(self):
+        if self.flush_job is not None:
+            self.widget.after_cancel(self.flush_job)
+            self.flush_job = None
+        if not self.pending:
+            return
+        text = "".join(self.pending)
+        self.pending = []
+        # One insert and one see() per frame, however many chunks arrived
+        if self.input_mark is None:
+            self.widget.insert(tk.END, text)
+        else:
+            # A right-gravity mark ends up after the inserted text; the input mark follows it
+            self.widget.mark_set(self.OUTPUT_MARK, self.input_mark)
+            self.widget.insert(self.OUTPUT_MARK, text)
+            self.widget.mark_set(self.input_mark, self.OUTPUT_MARK)
+        self.widget.see(tk.END)
+        if self.on_flush:
+            self.on_flush(text)
@@ -0,0 +1,123 @@
+import collections
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class RenderCache:
+    MAX_BYTES = 64 * 1024 * 1024
+
+    def __init__(self, directory=None, max_bytes=MAX_BYTES):
+        self.directory = directory  # rendered output is also written here when set
+        self.max_bytes = max_bytes
+        self.entries = collections.OrderedDict()  # key -> (rendered, size), in LRU order
+        self.total_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    @staticmethod
+    def make_key(path, renderer, style):
+        # A changed size or mtime gives a new key, so stale renders are never returned
+        stat = os.stat(path)
+        return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns, renderer, style)
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        rendered = self._load(key)
+        with self.lock:
+            if rendered is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store(key, rendered)
+        return rendered
+
+    def put(self, key, rendered):
+        with self.lock:
+            self._store(key, rendered)
+        if self.directory:
+            self.executor.submit(self._save, key, rendered)
+
+    def _store(self, key, rendered):
+        if key in self.entries:
+            self.total_bytes -= self.entries.pop(key)[1]
+        size = self.estimate_size(rendered)
+        if size > self.max_bytes:
+            return
+        self.entries[key] = (rendered, size)
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes:
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.total_bytes -= evicted_size
+
+    def estimate_size(self, rendered):
+        size = 0
+        for value in rendered.values():
+            if isinstance(value, str):
+                size += len(value)
+        if rendered.get("runs"):
+            # Token runs: a few dozen bytes per index string
+            size += 64 * sum(len(indexes) for tags in rendered["runs"].values() for indexes in tags.values())
+        return size
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "memory_bytes": self.total_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) * 100 / lookups if lookups else 0.0,
+            }
+
+    def disk_path(self, key):
+        # One file per (path, renderer, style); a newer render of the file replaces it
+        path, _, _, renderer, style = key
+        name = hashlib.sha1(f"{path}\0{renderer}\0{style}".encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, name + ".json")
+
+    def _load(self, key):
+        if not self.directory:
+            return None
+        try:
+            with open(self.disk_path(key), "r", encoding="utf-8") as cache_file:
+                cached = json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+        if tuple(cached.get("key", ())) != key:
+            return None
+        rendered = cached["rendered"]
+        if rendered.get("runs") is not None:
+            # JSON object keys are strings; chunk numbers are ints
+            rendered["runs"] = {int(chunk): tags for chunk, tags in rendered["runs"].items()}
+        return rendered
+
+    def _save(self, key, rendered):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self.disk_path(key)
+            with open(path + ".tmp", "w", encoding="utf-8") as cache_file:
+                json.dump({"key": key, "rendered": rendered}, cache_file)
+            os.replace(path + ".tmp", path)
+        except (OSError, TypeError, ValueError):
+            pass
+
+    def clear_disk(self):
+        if not self.directory or not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
@@ -0,0 +1,88 @@
+import collections
+import gzip
+import os
+import re
+
+class Scrollback:
+    MARK = "scrollback_counted"
+
+    def __init__(self, widget, max_lines=10000, max_chars=None, trim_batch=500, spill_path=None, end="end-1c"):
+        self.widget = widget
+        self.end = end  # counting stops here, e.g. at the start of a pending input line
+        self.max_lines = max_lines
+        self.max_chars = max_chars
+        self.trim_batch = trim_batch
+        self.spill_path = spill_path
+        # Ring of per-line lengths so the character limit can be enforced without asking Tk
+        self.line_lengths = collections.deque([0])
+        self.total_chars = 0
+        self.trimmed_lines = 0
+        # Everything before this mark has been counted into line_lengths
+        self.widget.mark_set(self.MARK, "1.0")
+        self.widget.mark_gravity(self.MARK, "left")
+
+    def append(self):
+        # Counts whatever reached the widget up to end since the last call, which includes
+        # entered input lines, not just rendered output. Returns the newly counted text.
+        text = self.widget.get(self.MARK, self.end)
+        self.widget.mark_set(self.MARK, self.end)
+        lines = text.split("\n")
+        self.line_lengths[-1] += len(lines[0])
+        for line in lines[1:]:
+            self.line_lengths.append(len(line))
+        self.total_chars += len(text)
+        self.trim()
+        return text
+
+    def line_count(self):
+        return int(self.widget.index("end-1c").split(".")[0])
+
+    def trim(self):
+        excess = 0
+        if self.max_lines:
+            over = self.line_count() - self.max_lines
+            if over >= self.trim_batch:
+                excess = over
+        if self.max_chars and self.total_chars - self.max_chars >= self.trim_batch * 80:
+            chars, lines = self.total_chars, 0
+            for length in self.line_lengths:
+                if chars <= self.max_chars:
+                    break
+                chars -= length + 1
+                lines += 1
+            excess = max(excess, lines)
+        if excess:
+            self.trim_lines(excess)
+
+    def trim_lines(self, count):
+        count = min(count, len(self.line_lengths) - 1, self.line_count() - 1)
+        if count <= 0:
+            return
+        end = f"{count + 1}.0"
+        if self.spill_path:
+            self.spill(self.widget.get("1.0", end))
+        self.widget.delete("1.0", end)
+        for _ in range(count):
+            self.total_chars -= self.line_lengths.popleft() + 1
+        self.trimmed_lines += count
+
+    def spill(self, text):
+        # Each append adds a gzip member; gzip readers treat the members as one stream
+        with gzip.open(self.spill_path, "at", encoding="utf-8") as spill_file:
+            spill_file.write(text)
+
+    def search_spilled(self, pattern, flags=0):
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return
+        regex = re.compile(pattern, flags)
+        with gzip.open(self.spill_path, "rt", encoding="utf-8", errors="replace") as spill_file:
+            for line_number, line in enumerate(spill_file, 1):
+                if regex.search(line):
+                    yield line_number, line.rstrip("\n")
+
+    def close(self):
+        self.clear_spill()
+
+    def clear_spill(self):
+        if self.spill_path and os.path.exists(self.spill_path):
+            os.remove(self.spill_path)
@@ -0,0 +1,238 @@
+import bisect
+import collections
+import itertools
+import re
+import time
+from array import array
+
+class SearchIndex:
+    # A copy of the terminal's text split into fixed blocks of lines, so a search can be
+    # cut into block-sized steps and new output only invalidates the last block. Lines are
+    # numbered from the start of the session; lines trimmed from the widget are dropped.
+    BLOCK_LINES = 2048
+
+    def __init__(self):
+        self.blocks = [[""]]  # lists of lines; trimmed blocks become None
+        self.first_line = 0  # session line number of the widget's first line
+        self.texts = {}  # block -> (joined text, line start offsets)
+        self.folded = {}  # block -> lowercased text, for case-insensitive literal searches
+
+    def line_count(self):
+        return (len(self.blocks) - 1) * self.BLOCK_LINES + len(self.blocks[-1])
+
+    def append(self, text):
+        # Returns the first block whose contents changed
+        first_block = len(self.blocks) - 1
+        lines = text.split("\n")
+        block = self.blocks[-1]
+        block[-1] += lines[0]
+        for line in lines[1:]:
+            if len(block) >= self.BLOCK_LINES:
+                block = []
+                self.blocks.append(block)
+            block.append(line)
+        for block_number in range(first_block, len(self.blocks)):
+            self.texts.pop(block_number, None)
+            self.folded.pop(block_number, None)
+        return first_block
+
+    def trim(self, first_line):
+        # Mirrors Scrollback: everything before first_line has left the widget
+        if first_line <= self.first_line:
+            return
+        self.first_line = first_line
+        for block_number in range(first_line // self.BLOCK_LINES):
+            if self.blocks[block_number] is not None:
+                self.blocks[block_number] = None
+                self.texts.pop(block_number, None)
+                self.folded.pop(block_number, None)
+
+    def block_text(self, block_number):
+        cached = self.texts.get(block_number)
+        if cached is None:
+            lines = self.blocks[block_number]
+            starts = array("L", itertools.accumulate((len(line) + 1 for line in lines[:-1]), initial=0))
+            cached = self.texts[block_number] = ("\n".join(lines), starts)
+        return cached
+
+    def folded_text(self, block_number):
+        # None when lowercasing changes the length, since offsets would no longer line up
+        if block_number not in self.folded:
+            text = self.block_text(block_number)[0]
+            folded = text.lower()
+            self.folded[block_number] = folded if len(folded) == len(text) else None
+        return self.folded[block_number]
+
+    def block_of(self, line):
+        return line // self.BLOCK_LINES
+
+class SearchJob:
+    # One query over a SearchIndex. Blocks are searched a few at a time by step(), starting
+    # from the one in view; blocks that navigation or the viewport need are searched on
+    # demand. Each block's matches are kept as offset arrays into its text, which keeps a
+    # million matches cheap; they become (line, column, end_line, end_column) in session
+    # line numbers only when looked at.
+    def __init__(self, index, pattern, regex=False, case=False, start_line=0, previous=None):
+        self.index = index
+        self.pattern = pattern
+        self.literal = not regex
+        self.case = case
+        flags = re.MULTILINE | (0 if case else re.IGNORECASE)
+        self.regex = re.compile(re.escape(pattern) if self.literal else pattern, flags)  # raises re.error
+        # Literal searches reject blocks with a substring test and match case-insensitively
+        # against lowercased text, both far cheaper than an IGNORECASE scan
+        self.needle = pattern if case else pattern.lower()
+        self.folded_regex = re.compile(re.escape(self.needle))
+        self.results = {}  # block -> (start offsets, end offsets)
+        self.total = 0
+        blocks = [block for block in range(len(index.blocks)) if index.blocks[block] is not None]
+        if previous is not None and self.refines(previous):
+            # Typing more of a literal query: only blocks that matched before can match now
+            blocks = [block for block in blocks
+                      if block in previous.pending_set or len(previous.results.get(block, EMPTY)[0])]
+        start = bisect.bisect_left(blocks, index.block_of(start_line))
+        self.pending = collections.deque(blocks[start:] + blocks[:start])
+        self.pending_set = set(blocks)
+
+    def refines(self, previous):
+        return (self.literal and previous.literal and self.case == previous.case
+                and previous.index is self.index and previous.pattern in self.pattern)
+
+    @property
+    def finished(self):
+        return not self.pending_set
+
+    def step(self, time_slice):
+        # Searches blocks until the time slice is used up; returns True once every block is done
+        deadline = time.perf_counter() + time_slice
+        while self.pending:
+            block = self.pending.popleft()
+            if block in self.pending_set:
+                self.search_block(block)
+                if time.perf_counter() > deadline:
+                    break
+        return self.finished
+
+    def ensure(self, block):
+        if block in self.pending_set:
+            self.search_block(block)
+
+    def search_block(self, block):
+        self.pending_set.discard(block)
+        if self.index.blocks[block] is None:
+            return
+        text = self.index.block_text(block)[0]
+        regex = self.regex
+        if self.literal:
+            haystack = text if self.case else self.index.folded_text(block)
+            if haystack is not None:
+                if self.needle not in haystack:
+                    self.results[block] = EMPTY
+                    return
+                text, regex = haystack, self.folded_regex
+        starts, ends = array("L"), array("L")
+        for match in regex.finditer(text, self.first_offset(block)):
+            start, end = match.span()
+            if start != end:
+                starts.append(start)
+                ends.append(end)
+        self.total += len(starts)
+        self.results[block] = (starts, ends)
+
+    def first_offset(self, block):
+        # Offset of the first line of block still in the widget
+        skipped = self.index.first_line - block * self.index.BLOCK_LINES
+        if skipped <= 0:
+            return 0
+        return self.index.block_text(block)[1][skipped]
+
+    def invalidate(self, first_block):
+        # New output changed first_block and everything after it; search those again first
+        for block in range(first_block, len(self.index.blocks)):
+            self.total -= len(self.results.pop(block, EMPTY)[0])
+            if block not in self.pending_set:
+                self.pending_set.add(block)
+                self.pending.appendleft(block)
+
+    def trim(self):
+        for block in list(self.results):
+            starts, ends = self.results[block]
+            if self.index.blocks[block] is None:
+                self.total -= len(starts)
+                del self.results[block]
+                continue
+            skip = bisect.bisect_left(starts, self.first_offset(block))
+            if skip:
+                self.total -= skip
+                self.results[block] = (starts[skip:], ends[skip:])
+        self.pending_set = {block for block in self.pending_set if self.index.blocks[block] is not None}
+
+    def match_at(self, block, position):
+        starts, ends = self.results[block]
+        line_starts = self.index.block_text(block)[1]
+        base = block * self.index.BLOCK_LINES
+        line = bisect.bisect_right(line_starts, starts[position]) - 1
+        end_line = bisect.bisect_right(line_starts, ends[position], line) - 1
+        return (base + line, starts[position] - line_starts[line],
+                base + end_line, ends[position] - line_starts[end_line])
+
+    def offset_of(self, block, line, column):
+        # Block text offset of a (line, column) position, clamped to the block
+        text, line_starts = self.index.block_text(block)
+        relative = line - block * self.index.BLOCK_LINES
+        if relative < 0:
+            return -1
+        if relative >= len(line_starts):
+            return float("inf")
+        line_end = line_starts[relative + 1] - 1 if relative + 1 < len(line_starts) else len(text)
+        return min(line_starts[relative] + column, line_end)
+
+    def matches_between(self, first_line, last_line):
+        # Matches starting on lines first_line..last_line, for highlighting the viewport
+        found = []
+        for block in range(self.index.block_of(first_line), self.index.block_of(last_line) + 1):
+            if block >= len(self.index.blocks):
+                break
+            self.ensure(block)
+            if block not in self.results:
+                continue
+            starts = self.results[block][0]
+            low = bisect.bisect_left(starts, self.offset_of(block, first_line, 0))
+            high = bisect.bisect_left(starts, self.offset_of(block, last_line + 1, 0))
+            found.extend(self.match_at(block, position) for position in range(low, high))
+        return found
+
+    def next_match(self, position, backwards=False):
+        # First match after (or before) position = (line, column), wrapping around
+        block_count = len(self.index.blocks)
+        start_block = min(self.index.block_of(position[0]), block_count - 1)
+        if backwards:
+            order = list(range(start_block, -1, -1)) + list(range(block_count - 1, start_block - 1, -1))
+        else:
+            order = list(range(start_block, block_count)) + list(range(start_block + 1))
+        for step, block in enumerate(order):
+            self.ensure(block)
+            starts = self.results.get(block, EMPTY)[0]
+            if not starts:
+                continue
+            if step == 0:
+                offset = self.offset_of(block, *position)
+                if backwards:
+                    index = bisect.bisect_left(starts, offset) - 1
+                else:
+                    index = bisect.bisect_right(starts, offset)
+                if 0 <= index < len(starts):
+                    return self.match_at(block, index)
+                continue
+            return self.match_at(block, len(starts) - 1 if backwards else 0)
+        return None
+
+    def rank(self, match):
+        # 1-based position of match among all matches, once every block has been searched
+        if not self.finished:
+            return None
+        block = self.index.block_of(match[0])
+        before = sum(len(self.results[other][0]) for other in self.results if other < block)
+        return before + bisect.bisect_left(self.results[block][0], self.offset_of(block, match[0], match[1])) + 1
+
+EMPTY = (array("L"), array("L"))
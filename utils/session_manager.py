@@ -0,0 +1,107 @@
+import codecs
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.command_processor import SSHClient, KnownHostsPolicy
+from utils.config import config_path
+
+class SessionManager:
+    # Keeps SSH connections to many hosts open at once and runs a command on all of them in
+    # parallel. Output arrives on a queue as (host, line) pairs, so a fan-out takes about as
+    # long as its slowest host.
+    MAX_WORKERS = 32
+    CHUNK_SIZE = 65536
+
+    def __init__(self, max_workers=MAX_WORKERS):
+        self.clients = {}  # host -> SSHClient
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.output_queue = queue.Queue()
+        # One policy for every client, so host keys from parallel connects are saved one at a time
+        self.host_key_policy = KnownHostsPolicy(config_path("known_hosts"))
+        self.pending = 0  # hosts still running the current broadcast
+        self.started = None
+        self.failures = 0
+
+    def hosts(self):
+        with self.lock:
+            return sorted(self.clients)
+
+    def connect(self, hosts, username, password):
+        for host in hosts:
+            self.executor.submit(self._connect, host, username, password)
+
+    def _connect(self, host, username, password):
+        client = SSHClient(self.host_key_policy)
+        if client.connect(host, username, password):
+            with self.lock:
+                previous = self.clients.pop(host, None)
+                self.clients[host] = client
+            if previous:
+                previous.close()
+            self.output_queue.put((host, "connected"))
+        else:
+            self.output_queue.put((host, f"connection failed: {str(client.last_error)}"))
+
+    def broadcast(self, command):
+        with self.lock:
+            clients = list(self.clients.items())
+            self.pending += len(clients)
+        self.started = time.perf_counter()
+        self.failures = 0
+        for host, client in clients:
+            self.executor.submit(self._run, host, client, command)
+        return len(clients)
+
+    def _run(self, host, client, command):
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        partial = ""
+        status = None
+        try:
+            channel = client.open_command_channel(command)
+            try:
+                while True:
+                    data = channel.recv(self.CHUNK_SIZE)
+                    if not data:
+                        break
+                    lines = (partial + decoder.decode(data)).split("\n")
+                    partial = lines.pop()
+                    for line in lines:
+                        self.output_queue.put((host, line))
+                partial += decoder.decode(b"", final=True)
+                if partial:
+                    self.output_queue.put((host, partial))
+                status = channel.recv_exit_status()
+            finally:
+                channel.close()
+        except Exception as e:
+            self.output_queue.put((host, f"error: {str(e)}"))
+        self.output_queue.put((host, f"exit status {status if status is not None else '?'}"))
+        with self.lock:
+            self.pending -= 1
+            if status != 0:
+                self.failures += 1
+
+    def is_running(self):
+        with self.lock:
+            return self.pending > 0
+
+    def read_output(self, max_lines=1000):
+        # Returns up to max_lines queued (host, line) pairs
+        lines = []
+        while len(lines) < max_lines:
+            try:
+                lines.append(self.output_queue.get_nowait())
+            except queue.Empty:
+                break
+        return lines
+
+    def disconnect(self, host=None):
+        with self.lock:
+            if host is None:
+                clients, self.clients = list(self.clients.values()), {}
+            else:
+                clients = [self.clients.pop(host)] if host in self.clients else []
+        for client in clients:
+            client.close()
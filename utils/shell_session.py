@@ -0,0 +1,234 @@
+import codecs
+import os
+import queue
+import re
+import shlex
+import struct
+import subprocess
+import threading
+
+if os.name != "nt":
+    import fcntl
+    import pty
+    import termios
+
+# The shell is told to emit this OSC sequence before every prompt so we can
+# follow its working directory and know when a command has finished.
+PROMPT_MARKER = re.compile(r"\x1b\]7;([^\x07\x1b]*)\x07")
+# Emitted just before it with the previous command's exit status
+EXIT_STATUS_MARKER = re.compile(r"\x1b\]133;D;(\d*)\x07")
+SHELL_MARKERS = re.compile(f"{EXIT_STATUS_MARKER.pattern}|{PROMPT_MARKER.pattern}")
+ANSI_ESCAPE = re.compile(r"\x1b(?:\[[0-?]*[ -/]*[@-~]|\][^\x07\x1b]*(?:\x07|\x1b\\)|[@-Z\\-_])")
+CONTROL_CHARS = re.compile(r"[\r\x07\x08\x00]")
+MAX_PENDING_ESCAPE = 256
+
+POSIX_INIT_COMMAND = (
+    "set +o emacs +o vi 2>/dev/null; unsetopt zle 2>/dev/null; setopt PROMPT_SUBST 2>/dev/null; "
+    "stty -echo 2>/dev/null; PROMPT_COMMAND=''; PS2=''; "
+    "PS1=\"$(printf '\\033]133;D;')\"'$?'\"$(printf '\\007\\033]7;')\"'$PWD'\"$(printf '\\007')\"'$PWD> '\n"
+)
+WINDOWS_PROMPT_COMMAND = (
+    "Write-Host -NoNewline ([char]27 + ']7;' + $PWD.Path + [char]7 + $PWD.Path + '> ')\n"
+)
+
+class ShellSession:
+    CHUNK_SIZE = 65536
+
+    def __init__(self):
+        self.output_queue = queue.Queue()
+        self.process = None
+        self.master_fd = None
+        self.reader = None
+        self.busy = False
+        self.exit_status = None  # of the last command, as reported by the prompt
+
+    def start(self, cwd=None):
+        env = dict(os.environ, TERM="dumb")
+        if os.name == "nt":
+            self.process = subprocess.Popen(
+                ["powershell.exe", "-NoLogo", "-NoProfile", "-NoExit", "-Command", "-"],
+                cwd=cwd,
+                env=env,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+            )
+            read = self.process.stdout.read1
+            self._write_raw(WINDOWS_PROMPT_COMMAND)
+        else:
+            self.master_fd, slave_fd = pty.openpty()
+            attrs = termios.tcgetattr(slave_fd)
+            attrs[3] &= ~termios.ECHO
+            termios.tcsetattr(slave_fd, termios.TCSANOW, attrs)
+            shell = os.environ.get("SHELL", "/bin/sh")
+            self.process = subprocess.Popen(
+                [shell, "-l"],
+                cwd=cwd,
+                env=env,
+                stdin=slave_fd,
+                stdout=slave_fd,
+                stderr=slave_fd,
+                preexec_fn=self._make_controlling_tty,
+            )
+            os.close(slave_fd)
+            master_fd = self.master_fd
+            read = lambda size: os.read(master_fd, size)
+            self._write_raw(POSIX_INIT_COMMAND)
+
+        self.busy = True
+        self.reader = threading.Thread(target=self._read_loop, args=(read,), daemon=True)
+        self.reader.start()
+
+    @staticmethod
+    def _make_controlling_tty():
+        os.setsid()
+        fcntl.ioctl(0, termios.TIOCSCTTY, 0)
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def _read_loop(self, read):
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        pending = ""
+        # Everything before the first prompt is startup noise (the init command, rc output)
+        ready = False
+        while True:
+            try:
+                data = read(self.CHUNK_SIZE)
+            except OSError:
+                break
+            if not data:
+                break
+            text = pending + decoder.decode(data)
+            text, pending = self._split_incomplete_escape(text)
+            if not ready:
+                match = PROMPT_MARKER.search(text)
+                if not match:
+                    continue
+                text = text[match.start():]
+                ready = True
+            self._publish(text)
+        self.output_queue.put(None)
+
+    def _split_incomplete_escape(self, text):
+        start = text.rfind("\x1b")
+        if start == -1 or len(text) - start > MAX_PENDING_ESCAPE:
+            return text, ""
+        if ANSI_ESCAPE.match(text, start) or PROMPT_MARKER.match(text, start):
+            return text, ""
+        return text[:start], text[start:]
+
+    def _publish(self, text):
+        position = 0
+        for match in SHELL_MARKERS.finditer(text):
+            self._put_output(text[position:match.start()])
+            if match.group(1) is not None:
+                self.output_queue.put(("status", int(match.group(1) or 0)))
+            else:
+                self.output_queue.put(("cwd", match.group(2)))
+            position = match.end()
+        self._put_output(text[position:])
+
+    def _put_output(self, text):
+        text = CONTROL_CHARS.sub("", ANSI_ESCAPE.sub("", text))
+        if text:
+            self.output_queue.put(text)
+
+    def read_output(self, max_chars):
+        # Drain queued output up to max_chars; returns (text, cwd, finished).
+        # cwd is the directory reported by the latest prompt, or None if no prompt arrived.
+        chunks = []
+        size = 0
+        cwd = None
+        finished = False
+        while size < max_chars:
+            try:
+                item = self.output_queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                finished = True
+                break
+            if isinstance(item, tuple):
+                if item[0] == "status":
+                    self.exit_status = item[1]
+                else:
+                    cwd = item[1]
+                    self.busy = False
+                continue
+            chunks.append(item)
+            size += len(item)
+        return "".join(chunks), cwd, finished
+
+    def send_command(self, command):
+        self.busy = True
+        self._write_raw(command + "\n")
+        if os.name == "nt":
+            self._write_raw(WINDOWS_PROMPT_COMMAND)
+
+    def _write_raw(self, text):
+        data = text.encode("utf-8")
+        if self.master_fd is not None:
+            while data:
+                written = os.write(self.master_fd, data)
+                data = data[written:]
+        else:
+            self.process.stdin.write(data)
+            self.process.stdin.flush()
+
+    def resize(self, columns, rows):
+        # The kernel signals SIGWINCH to the foreground job
+        if self.master_fd is not None:
+            fcntl.ioctl(self.master_fd, termios.TIOCSWINSZ, struct.pack("HHHH", rows, columns, 0, 0))
+
+    def interrupt(self):
+        if self.master_fd is not None:
+            # The line discipline turns ^C into SIGINT for the foreground job
+            self._write_raw("\x03")
+        else:
+            # No job control without a pty: end the session and let the owner start a new one
+            self.close()
+
+    def close(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+        if self.master_fd is not None:
+            os.close(self.master_fd)
+            self.master_fd = None
+        self.process = None
+
+class RemoteShellSession(ShellSession):
+    # The same prompt protocol over one long-lived SSH PTY channel: a command costs a single
+    # round trip, and the remote shell keeps its directory and environment between commands.
+    def __init__(self, ssh_client):
+        super().__init__()
+        self.ssh_client = ssh_client
+        self.channel = None
+
+    def start(self, cwd=None, columns=80, rows=24):
+        self.channel = self.ssh_client.open_shell(columns, rows)
+        if cwd:
+            self._write_raw(f"cd {shlex.quote(cwd)}\n")
+        self._write_raw(POSIX_INIT_COMMAND)
+        self.busy = True
+        self.reader = threading.Thread(target=self._read_loop, args=(self.channel.recv,), daemon=True)
+        self.reader.start()
+
+    def is_alive(self):
+        return self.channel is not None and not self.channel.closed and not self.channel.exit_status_ready()
+
+    def _write_raw(self, text):
+        self.channel.sendall(text.encode("utf-8"))
+
+    def resize(self, columns, rows):
+        if self.channel is not None and not self.channel.closed:
+            self.channel.resize_pty(width=columns, height=rows)
+
+    def interrupt(self):
+        # The remote line discipline turns ^C into SIGINT
+        self._write_raw("\x03")
+
+    def close(self):
+        if self.channel is not None:
+            self.channel.close()
+            self.channel = None
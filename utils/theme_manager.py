@@ -3,6 +3,9 @@ from tkinter import ttk
 from ttkthemes import ThemedStyle
 
 class ThemeManager:
+    LIGHT_SYNTAX_STYLE = "default"
+    DARK_SYNTAX_STYLE = "monokai"
+
     def __init__(self, terminal):
         self.terminal = terminal
         self.style = ThemedStyle(terminal)
@@ -13,6 +16,16 @@ class ThemeManager:
         fg_color = self.style.lookup('TFrame', 'foreground')
         self.terminal.terminal.configure(bg=bg_color, fg=fg_color, insertbackground=fg_color)
 
+    def syntax_style(self):
+        # Pygments style for the viewer's code, light or dark to match the active theme
+        background = self.style.lookup('TFrame', 'background') or "white"
+        try:
+            red, green, blue = self.terminal.winfo_rgb(background)
+        except tk.TclError:
+            return self.LIGHT_SYNTAX_STYLE
+        dark = red * 0.299 + green * 0.587 + blue * 0.114 < 32768
+        return self.DARK_SYNTAX_STYLE if dark else self.LIGHT_SYNTAX_STYLE
+
     def change_theme(self):
         themes = self.style.theme_names()
         theme = tk.StringVar(self.terminal)
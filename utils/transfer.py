@@ -0,0 +1,284 @@
+import collections
+import hashlib
+import os
+import posixpath
+import shlex
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+class TransferCancelled(Exception):
+    pass
+
+class ChecksumMismatch(Exception):
+    pass
+
+class TransferTask:
+    def __init__(self, direction, source, destination, size=0):
+        self.direction = direction  # "download" or "upload"
+        self.source = source
+        self.destination = destination
+        self.size = size
+        self.transferred = 0
+        self.status = "queued"
+        self.error = None
+        self.cancelled = False
+
+    @property
+    def name(self):
+        return posixpath.basename(self.source) if self.direction == "download" else os.path.basename(self.source)
+
+class TransferEngine:
+    # Copies files between the local disk and the SSH host. Each worker has its own SFTP
+    # session, so several files are in flight at once; reads are pipelined with prefetch
+    # and writes with set_pipelined. Data goes to a ".part" file that is renamed when
+    # complete, so an interrupted file resumes from where it stopped.
+    WORKERS = 4
+    BLOCK_SIZE = 256 * 1024
+    RETRIES = 3
+    MAX_PREFETCH_REQUESTS = 64
+    THROUGHPUT_WINDOW = 5.0  # seconds
+    PART_SUFFIX = ".part"
+
+    def __init__(self, ssh_client, workers=WORKERS, verify=True):
+        self.ssh_client = ssh_client
+        self.verify = verify
+        self.tasks = []
+        self.lock = threading.Lock()
+        self.generation = 0  # bumped by cancel() so directory walks in progress stop queueing
+        self.sessions = threading.local()
+        self.all_sessions = []
+        self.samples = collections.deque()  # (time, bytes) for the throughput estimate
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.scanner = ThreadPoolExecutor(max_workers=1)
+
+    def download(self, remote_path, local_directory):
+        self.scanner.submit(self._expand, "download", remote_path, local_directory)
+
+    def upload(self, local_path, remote_directory):
+        self.scanner.submit(self._expand, "upload", local_path, remote_directory)
+
+    def _expand(self, direction, source, destination_directory):
+        # Directories are walked on their own thread; files start transferring as they are found
+        generation = self.generation
+        try:
+            if direction == "download":
+                files = self._walk_remote(source, os.path.join(destination_directory, posixpath.basename(source.rstrip("/"))))
+            else:
+                files = self._walk_local(source, posixpath.join(destination_directory, os.path.basename(source.rstrip(os.sep))))
+            for file_source, file_destination, size in files:
+                if generation != self.generation:
+                    return
+                self.add_task(TransferTask(direction, file_source, file_destination, size))
+        except Exception as e:
+            task = TransferTask(direction, source, destination_directory)
+            task.status, task.error = "failed", str(e)
+            with self.lock:
+                self.tasks.append(task)
+
+    def _walk_remote(self, path, local_path):
+        sftp = self._session()
+        attrs = sftp.stat(path)
+        if not stat.S_ISDIR(attrs.st_mode or 0):
+            yield path, local_path, attrs.st_size or 0
+            return
+        os.makedirs(local_path, exist_ok=True)
+        for attr in sftp.listdir_attr(path):
+            child = posixpath.join(path, attr.filename)
+            if stat.S_ISDIR(attr.st_mode or 0):
+                yield from self._walk_remote(child, os.path.join(local_path, attr.filename))
+            else:
+                yield child, os.path.join(local_path, attr.filename), attr.st_size or 0
+
+    def _walk_local(self, path, remote_path):
+        if not os.path.isdir(path):
+            yield path, remote_path, os.path.getsize(path)
+            return
+        sftp = self._session()
+        for root, dirs, files in os.walk(path):
+            relative = os.path.relpath(root, path)
+            remote_root = remote_path if relative == "." else posixpath.join(remote_path, *relative.split(os.sep))
+            try:
+                sftp.mkdir(remote_root)
+            except IOError:
+                pass  # Already exists
+            for name in files:
+                local_file = os.path.join(root, name)
+                yield local_file, posixpath.join(remote_root, name), os.path.getsize(local_file)
+
+    def add_task(self, task):
+        with self.lock:
+            self.tasks.append(task)
+        self.executor.submit(self._run, task)
+
+    def _session(self):
+        # One SFTP session per worker thread; a dead one is replaced after a reconnect
+        sftp = getattr(self.sessions, "sftp", None)
+        if sftp is None or sftp.get_channel().closed:
+            sftp = self.ssh_client.with_reconnect(self.ssh_client.open_sftp)
+            self.sessions.sftp = sftp
+            with self.lock:
+                self.all_sessions.append(sftp)
+        return sftp
+
+    def _drop_session(self):
+        sftp = getattr(self.sessions, "sftp", None)
+        self.sessions.sftp = None
+        if sftp is not None:
+            with self.lock:
+                if sftp in self.all_sessions:
+                    self.all_sessions.remove(sftp)
+            try:
+                sftp.close()
+            except Exception:
+                pass
+
+    def _run(self, task):
+        for attempt in range(self.RETRIES + 1):
+            if task.cancelled:
+                task.status = "cancelled"
+                return
+            task.status = "running" if attempt == 0 else f"retrying ({attempt})"
+            try:
+                if task.direction == "download":
+                    self._download(task)
+                else:
+                    self._upload(task)
+                if self.verify:
+                    task.status = "verifying"
+                    self._verify(task)
+                task.status = "done"
+                return
+            except TransferCancelled:
+                task.status = "cancelled"
+                return
+            except ChecksumMismatch as e:
+                task.status, task.error = "failed", str(e)
+                return
+            except Exception as e:
+                # The partial file stays in place, so the next attempt resumes from it
+                task.error = str(e)
+                self._drop_session()
+        task.status = "failed"
+
+    def _download(self, task):
+        sftp = self._session()
+        part_path = task.destination + self.PART_SUFFIX
+        size = sftp.stat(task.source).st_size or 0
+        task.size = size
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if offset > size:
+            offset = 0
+        task.transferred = offset
+        with sftp.open(task.source, "rb") as remote, open(part_path, "ab" if offset else "wb") as local:
+            remote.seek(offset)
+            remote.prefetch(size, max_concurrent_requests=self.MAX_PREFETCH_REQUESTS)
+            while offset < size:
+                self._check_cancelled(task)
+                data = remote.read(min(self.BLOCK_SIZE, size - offset))
+                if not data:
+                    break
+                local.write(data)
+                offset += len(data)
+                self._progress(task, len(data))
+        os.replace(part_path, task.destination)
+
+    def _upload(self, task):
+        sftp = self._session()
+        part_path = task.destination + self.PART_SUFFIX
+        size = os.path.getsize(task.source)
+        task.size = size
+        try:
+            offset = sftp.stat(part_path).st_size or 0
+        except IOError:
+            offset = 0
+        if offset > size:
+            offset = 0
+        task.transferred = offset
+        with open(task.source, "rb") as local, sftp.open(part_path, "ab" if offset else "wb") as remote:
+            # Pipelined writes do not wait for each block's acknowledgement
+            remote.set_pipelined(True)
+            local.seek(offset)
+            while True:
+                self._check_cancelled(task)
+                data = local.read(self.BLOCK_SIZE)
+                if not data:
+                    break
+                remote.write(data)
+                self._progress(task, len(data))
+        try:
+            sftp.posix_rename(part_path, task.destination)
+        except IOError:
+            sftp.rename(part_path, task.destination)
+
+    def _verify(self, task):
+        local_path = task.destination if task.direction == "download" else task.source
+        remote_path = task.source if task.direction == "download" else task.destination
+        remote_digest = self._remote_sha256(remote_path)
+        if remote_digest is None:
+            # No sha256sum on the host; fall back to comparing sizes
+            remote_size = self._session().stat(remote_path).st_size
+            if remote_size != os.path.getsize(local_path):
+                raise ChecksumMismatch(f"size mismatch for {task.name}")
+            return
+        digest = hashlib.sha256()
+        with open(local_path, "rb") as local:
+            for block in iter(lambda: local.read(1024 * 1024), b""):
+                digest.update(block)
+        if digest.hexdigest() != remote_digest:
+            raise ChecksumMismatch(f"checksum mismatch for {task.name}")
+
+    def _remote_sha256(self, path):
+        # The path is absolute, and only stdout holds the digest
+        channel = self.ssh_client.open_command_channel(
+            f"sha256sum -- {shlex.quote(path)} 2>/dev/null", in_current_directory=False, combine_stderr=False
+        )
+        with channel.makefile("rb") as stdout:
+            output = stdout.read().decode(errors="replace").split()
+        if channel.recv_exit_status() != 0 or not output:
+            return None
+        return output[0].lower()
+
+    def _check_cancelled(self, task):
+        if task.cancelled:
+            raise TransferCancelled()
+
+    def _progress(self, task, count):
+        task.transferred += count
+        with self.lock:
+            self.samples.append((time.monotonic(), count))
+
+    def throughput(self):
+        # Bytes per second over the last few seconds
+        now = time.monotonic()
+        with self.lock:
+            while self.samples and now - self.samples[0][0] > self.THROUGHPUT_WINDOW:
+                self.samples.popleft()
+            total = sum(count for _, count in self.samples)
+        return total / self.THROUGHPUT_WINDOW
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.tasks)
+
+    def cancel(self):
+        # Stops everything queued or running; partial files are kept for a later resume
+        self.generation += 1
+        with self.lock:
+            for task in self.tasks:
+                if task.status not in ("done", "failed"):
+                    task.cancelled = True
+
+    def clear_finished(self):
+        with self.lock:
+            self.tasks = [task for task in self.tasks if task.status not in ("done", "failed", "cancelled")]
+
+    def close(self):
+        self.cancel()
+        self.executor.shutdown(wait=False)
+        self.scanner.shutdown(wait=False)
+        with self.lock:
+            sessions, self.all_sessions = self.all_sessions, []
+        for sftp in sessions:
+            sftp.close()